@@ -1,10 +1,21 @@
 """FastAPI 앱 생성 및 설정"""
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 
 from app.core.middleware import setup_cors
 from app.core.exceptions import validation_exception_handler
 from app.routers import health, pdf, potal
+from app.services.potal_automation import browser_pool, shutdown_playwright
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """애플리케이션 수명 주기 핸들러 (종료 시 브라우저 풀과 공유 Playwright 드라이버 정리)"""
+    yield
+    await browser_pool.close()
+    await shutdown_playwright()
 
 
 def create_app() -> FastAPI:
@@ -28,7 +39,8 @@ def create_app() -> FastAPI:
         version="1.0.0",
         docs_url="/docs",
         redoc_url="/redoc",
-        openapi_url="/openapi.json"
+        openapi_url="/openapi.json",
+        lifespan=lifespan
     )
     
     # 미들웨어 및 예외 핸들러 설정
@@ -1,5 +1,6 @@
 """애플리케이션 설정"""
-from typing import List
+import os
+from typing import List, Optional
 
 
 class Settings:
@@ -13,6 +14,22 @@ class Settings:
     
     # 로깅 설정
     log_level: str = "INFO"
+    
+    # 브라우저 자동화 설정
+    # 원격 브라우저 서버 WebSocket 엔드포인트 (예: ws://browser:3000/), 없으면 로컬 Chromium 실행
+    # (원격 브라우저는 서버 쪽 실행 옵션을 따르므로 아래 BROWSER_HEADLESS / BROWSER_BLOCK_IMAGES는 적용되지 않음)
+    browser_ws_endpoint: Optional[str] = os.getenv("BROWSER_WS_ENDPOINT") or None
+    # 헤드리스 모드 (true/false, 설정하지 않으면 도커 환경에서만 헤드리스)
+    browser_headless: Optional[bool] = (
+        os.getenv("BROWSER_HEADLESS").lower() in ("1", "true", "yes")
+        if os.getenv("BROWSER_HEADLESS") else None
+    )
+    # 이미지 로딩 차단 (true/false, 진행 화면 스크린샷을 쓰지 않는 배포에서 페이지 로드 단축)
+    browser_block_images: bool = os.getenv("BROWSER_BLOCK_IMAGES", "").lower() in ("1", "true", "yes")
+    # 브라우저 풀 크기 (동시에 실행할 수 있는 자동화 작업 수)
+    browser_pool_size: int = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+    # 브라우저 풀에서 브라우저를 기다릴 최대 시간 (초)
+    browser_acquire_timeout: float = float(os.getenv("BROWSER_ACQUIRE_TIMEOUT", "120"))
 
 
 settings = Settings()
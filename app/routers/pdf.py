@@ -1,6 +1,7 @@
 """PDF 자동화 라우터"""
 from fastapi import APIRouter, UploadFile, File, BackgroundTasks, HTTPException
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 import logging
 from pathlib import Path
 
@@ -9,8 +10,22 @@ from app.services.pdf_filler_service import fill_pdf_with_data
 from app.services.pdf_field_type_service import extract_field_types
 from app.models.schemas import FillPdfRequest, ExtractFieldTypesRequest, ExtractFieldValuesRequest
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+
+class _FastJSONResponse(JSONResponse):
+    """필드 구조 JSON 응답 (orjson은 선택 의존성: 설치되어 있으면 orjson으로 직렬화, 없으면 표준 json 사용)"""
+    
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
 router = APIRouter(tags=["PDF 자동화"])
 
 
@@ -40,7 +55,7 @@ async def upload_and_extract_endpoint(
     # 서비스를 통해 업로드 및 필드 추출
     result = await upload_and_extract(file.filename, contents)
     
-    return JSONResponse(content=result)
+    return _FastJSONResponse(content=result)
 
 
 @router.post(
@@ -63,8 +78,9 @@ async def fill_pdf_endpoint(
     request: FillPdfRequest,
     background_tasks: BackgroundTasks = BackgroundTasks()
 ):
-    # 서비스를 통해 PDF 채우기
-    return fill_pdf_with_data(
+    # 서비스를 통해 PDF 채우기 (CPU 작업은 스레드풀에서 실행하여 이벤트 루프 차단 방지)
+    return await run_in_threadpool(
+        fill_pdf_with_data,
         request.filename,
         request.fields,
         background_tasks
@@ -122,10 +138,10 @@ async def extract_field_types_endpoint(
         )
     
     try:
-        # 필드 타입 추출
-        field_types = extract_field_types(file_path)
+        # 필드 타입 추출 (스레드풀에서 실행)
+        field_types = await run_in_threadpool(extract_field_types, file_path)
         
-        return JSONResponse(content=field_types)
+        return _FastJSONResponse(content=field_types)
     except ValueError as e:
         logger.error(f"필드 타입 추출 중 오류: {str(e)}")
         raise HTTPException(
@@ -191,10 +207,10 @@ async def extract_field_values_endpoint(
         )
     
     try:
-        # 필드 값 추출
-        field_values = extract_field_values(file_path)
+        # 필드 값 추출 (스레드풀에서 실행)
+        field_values = await run_in_threadpool(extract_field_values, file_path)
         
-        return JSONResponse(content=field_values)
+        return _FastJSONResponse(content=field_values)
     except ValueError as e:
         logger.error(f"필드 값 추출 중 오류: {str(e)}")
         raise HTTPException(
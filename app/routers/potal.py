@@ -5,16 +5,25 @@ import logging
 import asyncio
 import base64
 import json
-from typing import Dict, Optional
+from contextlib import AsyncExitStack
+from typing import Dict, List, Optional
 
-from app.services.potal_automation import BrowserAutomation, EE_PORTAL_FORM_ITEMS, PROFILE_FORM_DATA
+from app.core.config import settings
+from app.services.potal_automation import (
+    BrowserAutomation,
+    EE_PORTAL_FORM_ITEMS,
+    PROFILE_FORM_DATA,
+    NORMALIZED_EE_PORTAL_FORM_ITEMS,
+    NORMALIZED_PROFILE_FORM_DATA,
+    browser_pool
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["포털 자동화"])
 
-# 동시 실행 제한을 위한 Semaphore (최대 2개 동시 실행)
-max_concurrent = asyncio.Semaphore(2)
+# 동시 실행 제한을 위한 Semaphore (브라우저 풀 크기만큼 동시 실행, 기본 2개)
+max_concurrent = asyncio.Semaphore(settings.browser_pool_size)
 
 # 중요 단계에서만 스크린샷 촬영 (사용하지 않음 - 특정 시점에서만 수동으로 촬영)
 IMPORTANT_STATUSES = {
@@ -145,11 +154,12 @@ async def websocket_automation_handler(websocket: WebSocket):
     logger.info("WebSocket 연결 수락")
     
     automation = None
-    async with max_concurrent:
+    # 브라우저 세션은 except 처리(디버깅 정보 저장 등)가 끝난 뒤 블록을 벗어날 때 풀에 반환됨 (취소 포함)
+    async with max_concurrent, AsyncExitStack() as session_stack:
         try:
-            # 브라우저 자동화 시작
+            # 브라우저 자동화 시작 (풀에서 브라우저 재사용)
             logger.info("브라우저 자동화 시작...")
-            automation = await BrowserAutomation.create()
+            automation = await session_stack.enter_async_context(browser_pool.session())
             
             # EE 포털 로그인 URL
             login_url = "https://onlineservices-servicesenligne-cic.fjgc-gccf.gc.ca/mycic/gccf?lang=eng&idp=gckey&svc=/mycic/start"
@@ -650,7 +660,7 @@ async def websocket_automation_handler(websocket: WebSocket):
             
             # 제공된 JSON 데이터를 순서대로 처리
             logger.info(f"JSON 데이터 순차 처리 시작 (총 {len(EE_PORTAL_FORM_ITEMS)}개 항목)...")
-            await automation.fill_form_sequential(EE_PORTAL_FORM_ITEMS, progress_callback=progress_callback)
+            await automation.fill_form_sequential(NORMALIZED_EE_PORTAL_FORM_ITEMS, progress_callback=progress_callback)
             logger.info("JSON 데이터 순차 처리 완료")
             
             # 저장 버튼 클릭 알림
@@ -723,11 +733,7 @@ async def websocket_automation_handler(websocket: WebSocket):
             
             # 작업 완료 후 브라우저 종료 전 대기
             await asyncio.sleep(0.5)
-            
-            # 모든 작업 완료 후 브라우저 종료
-            if automation:
-                await automation.close()
-            logger.info("모든 작업 완료. 브라우저 종료됨.")
+            logger.info("모든 작업 완료.")
             
             # 모든 작업 완료 후 WebSocket 연결 종료
             try:
@@ -743,24 +749,13 @@ async def websocket_automation_handler(websocket: WebSocket):
                 "status": "timeout",
                 "progress": 0
             })
-            if automation:
-                try:
-                    await automation.close()
-                except:
-                    pass
         except WebSocketDisconnect:
             logger.info("WebSocket 연결 종료")
-            if automation:
-                try:
-                    await automation.close()
-                except:
-                    pass
         except Exception as e:
             logger.error(f"WebSocket 처리 중 오류: {str(e)}")
             if automation:
                 try:
                     await automation.save_debug_info("ee_websocket_error")
-                    await automation.close()
                 except:
                     pass
             try:
@@ -798,9 +793,14 @@ async def send_progress_sse_with_screenshot(automation: BrowserAutomation, progr
 async def run_pr_automation_with_progress():
     """PR 포털 자동화 작업을 실행하면서 진행 상황을 스트리밍"""
     automation = None
+    # 브라우저를 반환하기 전에 정리할 하위 태스크 (클라이언트 연결이 끊겨도 세션을 계속 조작하지 않도록)
+    child_tasks: List[asyncio.Task] = []
+    # 동시 실행 제한과 브라우저 세션 (스트림이 끝날 때 finally에서 하위 태스크 정리 후 함께 해제)
+    session_stack = AsyncExitStack()
     try:
-        # 브라우저 초기화
-        automation = await BrowserAutomation.create()
+        await session_stack.enter_async_context(max_concurrent)
+        # 브라우저 초기화 (풀에서 브라우저 재사용)
+        automation = await session_stack.enter_async_context(browser_pool.session())
         
         # 로그인 페이지로 이동
         login_url = "https://prson-srpel.apps.cic.gc.ca/en/login"
@@ -843,6 +843,7 @@ async def run_pr_automation_with_progress():
                 await login_progress_queue.put(None)  # 완료 신호
         
         login_task_obj = asyncio.create_task(login_task())
+        child_tasks.append(login_task_obj)
         
         # 로그인 진행 상황을 실시간으로 전송
         while True:
@@ -914,10 +915,11 @@ async def run_pr_automation_with_progress():
         
         # fill_form_sequential을 별도 태스크로 실행
         async def fill_fields_task():
-            await automation.fill_form_sequential(PROFILE_FORM_DATA, progress_callback=pr_progress_callback)
+            await automation.fill_form_sequential(NORMALIZED_PROFILE_FORM_DATA, progress_callback=pr_progress_callback)
             progress_queue.put_nowait(None)  # 완료 신호
         
         fill_task = asyncio.create_task(fill_fields_task())
+        child_tasks.append(fill_task)
         
         # 진행률을 실시간으로 전송
         while True:
@@ -1014,13 +1016,18 @@ async def run_pr_automation_with_progress():
         
         yield f"data: {json.dumps(error_data)}\n\n"
     finally:
-        # 브라우저 종료
-        if automation:
-            try:
-                await automation.close()
-                logger.info("브라우저 종료 완료")
-            except Exception as e:
-                logger.error(f"브라우저 종료 중 오류: {str(e)}")
+        # 남은 하위 태스크를 취소하고 끝날 때까지 기다린 뒤 브라우저 반환
+        for task in child_tasks:
+            task.cancel()
+        if child_tasks:
+            await asyncio.gather(*child_tasks, return_exceptions=True)
+        
+        # 브라우저를 풀에 반환하고 동시 실행 슬롯 해제
+        try:
+            await session_stack.aclose()
+            logger.info("브라우저 반환 완료")
+        except Exception as e:
+            logger.error(f"브라우저 반환 중 오류: {str(e)}")
 
 
 @router.post(
@@ -1031,7 +1038,7 @@ async def run_pr_automation_with_progress():
     
     - 진행 상황을 실시간으로 스트리밍
     - SSE 형식으로 진행율과 메시지 전송
-    - 동시 실행: 최대 2개
+    - 동시 실행: 최대 2개 (BROWSER_POOL_SIZE로 변경 가능)
     """,
     response_description="Server-Sent Events 스트림"
 )
@@ -1040,14 +1047,14 @@ async def update_pr_profile_stream(request: Request):
     PR 포털 프로필 업데이트 API (SSE 스트리밍)
     진행 상황을 실시간으로 전송합니다.
     """
-    async with max_concurrent:
-        return StreamingResponse(
-            run_pr_automation_with_progress(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no"
-            }
-        )
+    # 동시 실행 제한은 스트림 안에서 작업이 끝날 때까지 유지 (응답 객체 반환 시점에 해제되지 않도록)
+    return StreamingResponse(
+        run_pr_automation_with_progress(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
 
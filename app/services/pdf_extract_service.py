@@ -3,16 +3,26 @@ import re
 import hashlib
 import logging
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Tuple, Any
 from lxml import etree as LET
 
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 
 from app.utils.utils import read_datasets_from_pdf, parse_xml, strip_ns
 
 logger = logging.getLogger(__name__)
 
+# 배열 인덱스 패턴 (모듈 로드 시 한 번만 컴파일)
+_INDEX_RE = re.compile(r'\[\d+\]')                  # "KeepPageSeparate[0]" 의 "[0]"
+_INDEXED_PART_RE = re.compile(r"^(.+)\[(\d+)\]$")    # "KeepPageSeparate[0]" -> ("KeepPageSeparate", "0")
+
+# datasets의 data / form 노드 탐색용 XPath (모듈 로드 시 한 번만 컴파일)
+_FIND_DATA_NODES = LET.XPath("//*[local-name()='data']")
+_FIND_FORM_NODES = LET.XPath("//*[local-name()='form']")
+
 # ============== XML 유틸 ==============
 def _find_base_form_node(xml_bytes: bytes) -> tuple[LET._Element, str]:
     """
@@ -21,10 +31,13 @@ def _find_base_form_node(xml_bytes: bytes) -> tuple[LET._Element, str]:
     - 없으면 xfa:form / form
     - 그것도 없으면 루트
     """
-    root = parse_xml(xml_bytes)
+    return _find_base_form_node_in_root(parse_xml(xml_bytes))
+
 
+def _find_base_form_node_in_root(root: LET._Element) -> tuple[LET._Element, str]:
+    """이미 파싱된 루트에서 base 노드를 찾습니다. (규칙은 _find_base_form_node와 동일)"""
     # data 노드 우선
-    data_nodes = root.xpath("//*[local-name()='data']")
+    data_nodes = _FIND_DATA_NODES(root)
     data_node = data_nodes[0] if data_nodes else None
     if data_node is not None and len(data_node):
         children = [c for c in data_node if isinstance(c.tag, str)]
@@ -32,7 +45,7 @@ def _find_base_form_node(xml_bytes: bytes) -> tuple[LET._Element, str]:
             return children[0], strip_ns(children[0].tag)
 
     # form 노드 사용
-    form_nodes = root.xpath("//*[local-name()='form']")
+    form_nodes = _FIND_FORM_NODES(root)
     if form_nodes:
         return form_nodes[0], strip_ns(form_nodes[0].tag)
 
@@ -40,56 +53,24 @@ def _find_base_form_node(xml_bytes: bytes) -> tuple[LET._Element, str]:
     return root, strip_ns(root.tag)
 
 
-# ============== 경로/반복 인덱스 계산 ==============
-def _xpath_from_to(elem: LET._Element, base: LET._Element) -> str:
-    """
-    base를 루트로 하는 상대 XPath (예: './Page2/Contact/Email')
-    동일 태그 반복 시 [n] (1-based) 부여
-    """
-    parts: List[str] = []
-    cur = elem
-    while cur is not None and cur is not base:
-        parent = cur.getparent()
-        tag = strip_ns(cur.tag)
-        if parent is not None:
-            same = [c for c in parent if strip_ns(c.tag) == tag]
-            if len(same) > 1:
-                idx = same.index(cur) + 1
-                parts.append(f"{tag}[{idx}]")
-            else:
-                parts.append(tag)
-        else:
-            parts.append(tag)
-        cur = parent
-    parts.reverse()
-    return "./" + "/".join(parts) if parts else "."
-
-def _path_with_index(elem: LET._Element, base: LET._Element) -> List[Tuple[str, int]]:
+# ============== JSON 스키마 빌더 ==============
+def _set_in_nested(obj: dict, path: List[Tuple[str, int]], trail: List[Any] | None = None, start: int = 0) -> None:
     """
-    JSON 키 생성을 위한 (tag, idx) 경로. idx=-1은 단일, >=0는 배열 위치.
+    path를 따라 템플릿(obj)에 노드를 만들고 leaf는 ""로 설정합니다.
+    
+    trail이 주어지면 각 단계 직전의 노드(trail[i] = i번째 단계 직전 cur)를 기록하고,
+    start > 0이면 trail[start]에서 바로 이어서 진행합니다. (앞 경로와 같은 중간 경로 재순회 생략)
     """
-    rev: List[Tuple[str, int]] = []
-    cur = elem
-    while cur is not None and cur is not base:
-        parent = cur.getparent()
-        tag = strip_ns(cur.tag)
-        idx = -1
-        if parent is not None:
-            same = [c for c in parent if strip_ns(c.tag) == tag]
-            if len(same) > 1:
-                idx = same.index(cur)  # 0-based for JSON
-        rev.append((tag, idx))
-        cur = parent
-    rev.reverse()
-    return rev  # base 태그는 포함하지 않음
-
-# ============== JSON 스키마 빌더 ==============
-def _set_in_nested(obj: dict, path: List[Tuple[str, int]]) -> None:
     if not path:
         return
     
-    cur = obj
-    for i, (tag, idx) in enumerate(path):
+    cur = trail[start] if start else obj
+    if trail is not None:
+        del trail[start:]
+    for i in range(start, len(path)):
+        tag, idx = path[i]
+        if trail is not None:
+            trail.append(cur)
         is_leaf = (i == len(path) - 1)
 
         if idx >= 0:
@@ -188,46 +169,84 @@ class Field:
 def _is_leaf(el: LET._Element) -> bool:
     # 자식 element가 없고(텍스트/공백만 있을 수 있음) → leaf 취급
     # 또는 자식 element가 있지만 텍스트 값도 있는 경우 → leaf 취급 (예: <FamilyMember>123</FamilyMember>)
-    has_text = (el.text and el.text.strip()) or False
-    has_children = any(isinstance(c.tag, str) for c in el)
     # 텍스트가 있으면 leaf로 취급 (자식 element가 있어도)
-    if has_text:
+    text = el.text
+    if text and text.strip():
         return True
-    # 텍스트가 없고 자식 element만 있으면 leaf가 아님
-    return not has_children
+    # 자식이 하나도 없으면 바로 leaf (대부분의 경우 - 자식 순회 불필요)
+    if len(el) == 0:
+        return True
+    # 텍스트가 없고 자식 element만 있으면 leaf가 아님 (주석 등 element가 아닌 자식만 있으면 leaf)
+    return not any(isinstance(c.tag, str) for c in el)
+
+# xfa:dataNode 속성 이름 (XFA 데이터 네임스페이스)
+_DATA_NODE_ATTR = "{http://www.xfa.org/schema/xfa-data/1.0/}dataNode"
 
 def _has_data_group_ancestor(el: LET._Element) -> bool:
     """
     노드나 그 조상 노드 중 하나가 xfa:dataNode="dataGroup" 속성을 가지는지 확인합니다.
     """
-    # XFA 데이터 네임스페이스
-    xfa_ns = "http://www.xfa.org/schema/xfa-data/1.0/"
-    data_node_attr = f"{{{xfa_ns}}}dataNode"
-    
     cur = el
     while cur is not None:
         # 현재 노드가 xfa:dataNode="dataGroup" 속성을 가지는지 확인
-        data_node_value = cur.get(data_node_attr)
+        data_node_value = cur.get(_DATA_NODE_ATTR)
         if data_node_value == "dataGroup":
             return True
         cur = cur.getparent()
     return False
 
 def _collect_leaf_fields(base: LET._Element) -> List[Field]:
+    """
+    base 아래 leaf 노드를 문서 순서대로 한 번만 순회하여 수집합니다.
+    
+    형제 태그 개수는 부모마다 한 번만 세고, 경로(json_path / rel_xpath)는
+    부모 경로를 이어받아 만듭니다. (노드마다 조상/형제를 다시 훑지 않음)
+    rel_xpath / key_for_map 문자열도 부모 문자열에 자기 구간만 붙여서 만듭니다.
+    """
     fields: List[Field] = []
-    for el in base.iter():
-        if not isinstance(el.tag, str):
-            continue
-        # xfa:dataNode="dataGroup" 속성을 가진 노드나 그 자식은 제외
-        if _has_data_group_ancestor(el):
-            continue
+    # xfa:dataNode="dataGroup" 속성을 가진 노드나 그 자식은 제외
+    # (base와 그 조상은 여기서 한 번만 확인하고, 아래쪽은 순회 중 하위 트리째 건너뜀)
+    if _has_data_group_ancestor(base):
+        return fields
+    
+    # (요소, base부터의 (tag, idx) 경로, rel_xpath, key) 스택 - 전위 순회 (base.iter()와 같은 순서)
+    stack: List[Tuple[LET._Element, List[Tuple[str, int]], str, str]] = [(base, [], ".", "")]
+    while stack:
+        el, jp, rx, key = stack.pop()
+        
+        # 자식 경로 계산: 같은 태그 형제가 여러 개면 0-based 인덱스, 하나면 -1
+        children = []
+        tag_counts: Dict[str, int] = {}
+        for c in el:
+            if isinstance(c.tag, str):
+                tag = strip_ns(c.tag)
+                children.append((c, tag))
+                tag_counts[tag] = tag_counts.get(tag, 0) + 1
+        seen: Dict[str, int] = {}
+        child_items = []
+        for c, tag in children:
+            if tag_counts[tag] > 1:
+                idx = seen.get(tag, 0)
+                seen[tag] = idx + 1
+            else:
+                idx = -1
+            if c.get(_DATA_NODE_ATTR) == "dataGroup":
+                continue
+            if idx >= 0:
+                # rel_xpath는 1-based, key는 0-based 인덱스
+                child_rx = f"{rx}/{tag}[{idx + 1}]"
+                seg = f"{tag}[{idx}]"
+            else:
+                child_rx = f"{rx}/{tag}"
+                seg = tag
+            child_items.append((c, jp + [(tag, idx)], child_rx, f"{key}.{seg}" if key else seg))
+        stack.extend(reversed(child_items))
+        
         if _is_leaf(el):
-            rx = _xpath_from_to(el, base)
-            jp = _path_with_index(el, base)
-            key = ".".join([f"{t}[{i}]" if i >= 0 else t for t, i in jp])
             # 버튼 필드 제외 (SaveButton, ResetButton, PrintButton)
             # 태그 이름에서 버튼 필드 확인
-            tag_name = LET.QName(el).localname if hasattr(LET, 'QName') else el.tag.split('}')[-1] if '}' in el.tag else el.tag
+            # (경로 계산 시 이미 구한 태그 이름 재사용)
+            tag_name = jp[-1][0] if jp else strip_ns(el.tag)
             if any(btn in tag_name for btn in ["SaveButton", "ResetButton", "PrintButton"]):
                 continue
             fields.append(Field(elem=el, rel_xpath=rx, json_path=jp, key_for_map=key))
@@ -243,8 +262,19 @@ def _collect_leaf_fields(base: LET._Element) -> List[Field]:
 # ============== JSON 템플릿 생성 ==============
 def _build_json_template(base_tag: str, fields: List[Field]) -> dict:
     tpl: dict = {}
+    # 직전 필드와 공통인 중간 경로는 다시 내려가지 않고 기록된 노드에서 이어서 진행
+    # (필드는 문서 순서라 인접 필드끼리 Page1/Contact/... 같은 앞부분을 공유함, 키 순서 유지를 위해 정렬하지 않음)
+    trail: List[Any] = []
+    prev_path: List[Tuple[str, int]] = []
     for f in fields:
-        _set_in_nested(tpl, f.json_path)
+        path = f.json_path
+        # 재사용 가능한 깊이: 공통 접두어 중 양쪽 모두 중간 노드인 단계까지 (leaf 단계는 항상 다시 처리)
+        limit = min(len(path), len(prev_path), len(trail)) - 1
+        common = 0
+        while common < limit and path[common] == prev_path[common]:
+            common += 1
+        _set_in_nested(tpl, path, trail, common)
+        prev_path = path
     return {base_tag: tpl}
 
 # ============== 유틸리티 함수 ==============
@@ -291,7 +321,7 @@ def _build_field_template(pdf_path: Path) -> dict:
         필드 구조를 담은 JSON 딕셔너리 (값은 빈 문자열)
     """
     # 1) datasets.xml 추출
-    datasets_bytes = read_datasets_from_pdf(pdf_path)
+    datasets_bytes = _read_datasets(pdf_path)
     base_node, base_tag = _find_base_form_node(datasets_bytes)
     fields = _collect_leaf_fields(base_node)
 
@@ -447,8 +477,7 @@ def _build_field_template(pdf_path: Path) -> dict:
                 _set_in_nested(json_tpl[base_tag], json_path)
             except Exception as e:
                 logger.error(f"경로 추가 중 오류: tail={tail}, path_key={path_key if 'path_key' in locals() else 'N/A'}, 오류={type(e).__name__}: {str(e)}")
-                import traceback
-                logger.error(f"상세 오류: {traceback.format_exc()}")
+                logger.debug("상세 오류", exc_info=True)
                 # 오류가 발생해도 계속 진행
                 continue
     
@@ -612,9 +641,41 @@ def _build_path_with_array_indices(
     return json_path
 
 # ============== form XML 읽기 ==============
+def _file_cache_key(pdf_path: Path) -> tuple[str, int, int] | None:
+    """PDF 파트 캐시 키 (경로, mtime_ns, 크기). 파일이 바뀌면 키도 바뀌어 캐시가 자동으로 무효화됨"""
+    try:
+        st = Path(pdf_path).stat()
+    except OSError:
+        return None
+    return str(pdf_path), st.st_mtime_ns, st.st_size
+
+
+@lru_cache(maxsize=16)
+def _read_datasets_cached(pdf_path: str, mtime_ns: int, size: int) -> bytes:
+    return read_datasets_from_pdf(pdf_path)
+
+
+def _read_datasets(pdf_path: Path) -> bytes:
+    """
+    datasets.xml 바이트를 읽습니다.
+    같은 요청 안에서(템플릿 생성 → 값 채우기) 그리고 같은 파일에 대한 반복 요청에서
+    PDF를 다시 열지 않도록 (경로, mtime, 크기) 기준으로 캐시합니다.
+    """
+    key = _file_cache_key(pdf_path)
+    if key is None:
+        return read_datasets_from_pdf(pdf_path)
+    return _read_datasets_cached(*key)
+
+
+@lru_cache(maxsize=32)
+def _read_xfa_part_cached(pdf_path: str, mtime_ns: int, size: int, part_name: str) -> bytes | None:
+    return _read_xfa_part_uncached(Path(pdf_path), part_name)
+
+
 def _read_xfa_part_from_pdf(pdf_path: Path, part_name: str) -> bytes | None:
     """
     XFA /XFA 배열에서 특정 파트 이름을 찾아 그대로 반환.
+    (경로, mtime, 크기) 기준으로 캐시하므로 파일이 바뀌지 않았으면 PDF를 다시 열지 않음
     
     Args:
         pdf_path: PDF 파일 경로
@@ -623,6 +684,13 @@ def _read_xfa_part_from_pdf(pdf_path: Path, part_name: str) -> bytes | None:
     Returns:
         파트의 바이트 데이터 또는 None
     """
+    key = _file_cache_key(pdf_path)
+    if key is None:
+        return _read_xfa_part_uncached(pdf_path, part_name)
+    return _read_xfa_part_cached(*key, part_name)
+
+
+def _read_xfa_part_uncached(pdf_path: Path, part_name: str) -> bytes | None:
     try:
         import pikepdf
 
@@ -754,9 +822,6 @@ def extract_field_values(pdf_path: Path) -> dict:
     Returns:
         필드 구조와 값이 포함된 JSON 딕셔너리
     """
-    # re 모듈 명시적 import (순환 import 문제 방지)
-    import re
-    
     # 1) 공통 함수로 필드 템플릿 생성 (빈 문자열로)
     # 이 함수는 datasets.xml과 form.xml의 모든 필드 경로를 포함합니다
     # 중요: extract_fields_from_pdf와 동일한 함수를 사용하여 필드 키가 일치하도록 보장
@@ -767,7 +832,7 @@ def extract_field_values(pdf_path: Path) -> dict:
 
     # 2) datasets.xml에서 값 채우기
     # 중요: _build_field_template에서 사용한 것과 동일한 방식으로 필드 수집
-    datasets_bytes = read_datasets_from_pdf(pdf_path)
+    datasets_bytes = _read_datasets(pdf_path)
     base_node, _ = _find_base_form_node(datasets_bytes)
     fields = _collect_leaf_fields(base_node)
     
@@ -782,24 +847,23 @@ def extract_field_values(pdf_path: Path) -> dict:
     for field in fields:
         v = (field.elem.text or "").strip()
         
-        # JSON 경로 생성
+        # JSON 경로 생성 (배열 인덱스 포함 / 제외 경로를 함께 생성 - 정규식 치환 불필요)
         json_parts = []
+        clean_parts = []
         for tag, idx in field.json_path:
             if idx >= 0:
                 json_parts.append(f"{tag}[{idx}]")
             else:
                 json_parts.append(tag)
+            clean_parts.append(tag)
         json_path = f"{base_tag}.{'.'.join(json_parts)}"
         
         # 값이 없는 경우에도 추출 시도 (빈 문자열로라도)
         
         # 라디오 버튼 필드의 경우, 템플릿의 값 매핑을 사용하여 변환
-        # 배열 인덱스를 제거한 경로로 타입 정보 조회
-        clean_json_path = re.sub(r'\[\d+\]', '', json_path)
-        # base_tag를 제거한 경로로도 시도
-        clean_json_path_without_base = clean_json_path
-        if clean_json_path.startswith(f"{base_tag}."):
-            clean_json_path_without_base = clean_json_path[len(base_tag) + 1:]
+        # 배열 인덱스를 제거한 경로로 타입 정보 조회 (base_tag를 제거한 경로로도 시도)
+        clean_json_path_without_base = ".".join(clean_parts)
+        clean_json_path = f"{base_tag}.{clean_json_path_without_base}"
         
         # 여러 경로로 타입 정보 조회 시도
         field_type_info = (
@@ -887,11 +951,10 @@ def extract_field_values(pdf_path: Path) -> dict:
             try:
                 # vals: list[str] (값이 없으면 빈 리스트)
                 # 배열 인덱스 파싱: "Page1.KeepPageSeparate[0].FamilyMember" -> ["Page1", ("KeepPageSeparate", 0), "FamilyMember"]
-                import re
                 parts = []
                 for part in full_json_path.split("."):
                     # 배열 인덱스 추출: "KeepPageSeparate[0]" -> ("KeepPageSeparate", 0)
-                    match = re.match(r"^(.+)\[(\d+)\]$", part)
+                    match = _INDEXED_PART_RE.match(part)
                     if match:
                         parts.append((match.group(1), int(match.group(2))))
                     else:
@@ -925,11 +988,9 @@ def extract_field_values(pdf_path: Path) -> dict:
                 
                 # 라디오 버튼 필드의 경우, 템플릿의 값 매핑을 사용하여 변환
                 # 배열 인덱스를 제거한 경로로 타입 정보 조회
-                clean_json_path = re.sub(r'\[\d+\]', '', full_json_path)
+                clean_json_path = _INDEX_RE.sub('', full_json_path)
                 # base_tag를 제거한 경로로도 시도
-                clean_json_path_without_base = clean_json_path
-                if clean_json_path.startswith(f"{base_tag}."):
-                    clean_json_path_without_base = clean_json_path[len(base_tag) + 1:]
+                clean_json_path_without_base = clean_json_path.removeprefix(f"{base_tag}.")
                 
                 # 여러 경로로 타입 정보 조회 시도
                 field_type_info = (
@@ -1059,7 +1120,8 @@ async def upload_and_extract(filename: str, contents: bytes) -> Dict[str, Any]:
         
         # ---- 여기서부터는 파일이 있다고 가정 ----
         # 스키마 추출 (빈 문자열로 채워진 템플릿)
-        fields_json = extract_fields_from_pdf(file_path)
+        # PDF/XML 파싱은 CPU 작업이므로 스레드풀에서 실행 (이벤트 루프 차단 방지)
+        fields_json = await run_in_threadpool(extract_fields_from_pdf, file_path)
         
         # 최종 응답: 빈 문자열로 채워진 필드 구조만 반환 (extract_field_values와 동일한 형식)
         return fields_json
@@ -7,27 +7,55 @@ from fastapi import HTTPException
 from fastapi.responses import FileResponse
 
 from app.utils.utils import (
-    read_datasets_from_pdf,
-    write_datasets_to_pdf,
+    get_xfa_handle,
+    read_datasets,
+    write_datasets,
     parse_xml,
     serialize_xml,
-    strip_ns
+    strip_ns,
+    build_path_index
 )
-from app.services.pdf_extract_service import _find_base_form_node
+from app.services.pdf_extract_service import _find_base_form_node_in_root
+from itertools import islice
 from lxml import etree
+import pikepdf
 
 import os
+import uuid
 
 logger = logging.getLogger(__name__)
 
 
-def _set_or_create_node(base_node: etree._Element, path_parts: List[str], value: str):
+def _path_index_key(path_parts: List[str]) -> Tuple[Tuple[str, int], ...]:
+    """JSON 경로를 build_path_index의 키 형식으로 변환합니다.
+    
+    예: ["Page1", "KeepPageSeparate", "[1]", "FamilyMember"]
+        -> (("Page1", 0), ("KeepPageSeparate", 1), ("FamilyMember", 0))
+    """
+    key = []
+    i = 0
+    while i < len(path_parts):
+        part = path_parts[i]
+        if part.startswith("[") and part.endswith("]"):
+            i += 1
+            continue
+        if i + 1 < len(path_parts) and path_parts[i + 1].startswith("[") and path_parts[i + 1].endswith("]"):
+            key.append((part, int(path_parts[i + 1][1:-1])))
+            i += 2
+        else:
+            key.append((part, 0))
+            i += 1
+    return tuple(key)
+
+
+def _set_or_create_node(base_node: etree._Element, path_parts: List[str], value: str, index: Dict[Tuple[Tuple[str, int], ...], etree._Element] = None):
     """노드를 찾아서 값을 설정하고, 없으면 생성합니다.
     
     Args:
         base_node: 시작 노드 (예: IMM_0800)
         path_parts: 경로 부분 리스트 (배열 인덱스 포함, 예: ["Page1", "KeepPageSeparate", "[0]", "FamilyMember"])
         value: 설정할 값
+        index: build_path_index(base_node) 결과 (있으면 트리를 다시 순회하지 않고 바로 찾음)
     """
     # 플레이스홀더 값 처리: *로 시작하는 값은 빈 문자열로 처리
     if value and value.strip().startswith("*"):
@@ -37,6 +65,21 @@ def _set_or_create_node(base_node: etree._Element, path_parts: List[str], value:
     parent_node = None  # 라디오 버튼 처리를 위한 부모 노드 추적
     i = 0
     
+    # 인덱스에 있는 기존 노드면 경로 순회 생략
+    if index is not None:
+        node = index.get(_path_index_key(path_parts))
+        if node is not None:
+            if len(path_parts) >= 2 and path_parts[-2] == path_parts[-1]:
+                # 라디오 버튼 그룹: 순회 시와 동일하게 마지막에서 두 번째 노드의 부모를 저장
+                # (마지막 부분이 배열 인덱스인 경우는 순회로 처리)
+                if not (path_parts[-1].startswith("[") and path_parts[-1].endswith("]")):
+                    parent_node = node.getparent().getparent()
+                    cur = node
+                    i = len(path_parts)
+            else:
+                cur = node
+                i = len(path_parts)
+    
     while i < len(path_parts):
         part = path_parts[i]
         
@@ -56,8 +99,8 @@ def _set_or_create_node(base_node: etree._Element, path_parts: List[str], value:
         else:
             i += 1  # 태그만 처리
         
-        # 자식 노드 찾기
-        children = [c for c in cur if strip_ns(c.tag) == tag_name]
+        # 자식 노드 찾기 (lxml이 C 레벨에서 태그 필터링, {*}는 모든 네임스페이스)
+        tag_filter = f"{{*}}{tag_name}"
         
         # 라디오 버튼 처리를 위해 부모 노드 저장 (마지막 두 부분이 같을 때 사용)
         # 경로의 마지막 두 부분이 같으면, 첫 번째 노드를 라디오 버튼 그룹으로 간주
@@ -69,20 +112,18 @@ def _set_or_create_node(base_node: etree._Element, path_parts: List[str], value:
                 parent_node = cur
         
         if array_idx is not None:
-            # 배열 인덱스가 있으면 해당 인덱스의 노드 사용/생성
+            # 배열 인덱스가 있으면 해당 인덱스의 노드 사용/생성 (필요한 개수까지만 가져옴)
+            children = list(islice(cur.iterchildren(tag_filter), array_idx + 1))
             while len(children) <= array_idx:
-                new_node = etree.Element(tag_name)
-                cur.append(new_node)
-                children.append(new_node)
+                children.append(etree.SubElement(cur, tag_name))
             cur = children[array_idx]
         else:
             # 배열 인덱스가 없으면 첫 번째 노드 사용/생성
-            if children:
-                cur = children[0]
+            first_child = next(cur.iterchildren(tag_filter), None)
+            if first_child is not None:
+                cur = first_child
             else:
-                new_node = etree.Element(tag_name)
-                cur.append(new_node)
-                cur = new_node
+                cur = etree.SubElement(cur, tag_name)
     
     # 마지막 노드에 값 설정
     # XFA 특수 노드 처리: #value, #integer 등
@@ -113,6 +154,11 @@ def _set_or_create_node(base_node: etree._Element, path_parts: List[str], value:
                         child.text = ""
                 return
     
+    # 자식이 없는 노드(대부분의 leaf 필드)는 옵션/#value 노드가 있을 수 없으므로 바로 설정
+    if len(cur) == 0:
+        cur.text = final_value
+        return
+    
     # 일반적인 라디오 버튼 처리: 현재 노드의 자식 노드들 중에서 값과 일치하는 옵션 필드를 찾아서 처리
     if final_value:
         # 현재 노드의 자식 노드들을 확인
@@ -137,11 +183,10 @@ def _set_or_create_node(base_node: etree._Element, path_parts: List[str], value:
             return
     
     # #value 노드가 있으면 그 안의 #integer 또는 직접 텍스트에 설정
-    value_nodes = [c for c in cur if strip_ns(c.tag) == "#value"]
-    if value_nodes:
-        value_node = value_nodes[0]
+    value_node = next(cur.iterchildren("{*}#value"), None)
+    if value_node is not None:
         # #integer 노드 찾기
-        integer_nodes = [c for c in value_node if strip_ns(c.tag) == "#integer"]
+        integer_nodes = list(islice(value_node.iterchildren("{*}#integer"), 1))
         if integer_nodes:
             # #integer 노드에 숫자만 설정 (숫자가 아니면 빈 문자열)
             try:
@@ -175,59 +220,22 @@ def _build_json_path_with_indices(data: Any, current_path: List[str] = None) ->
     
     results = []
     
-    if isinstance(data, dict):
-        for key, value in data.items():
-            new_path = current_path + [key]
-            if isinstance(value, (dict, list)):
-                results.extend(_build_json_path_with_indices(value, new_path))
-            else:
-                # 리프 노드
-                results.append((new_path, value))
-    elif isinstance(data, list):
-        for idx, item in enumerate(data):
+    # 재귀 대신 명시적 스택으로 순회 (자식을 역순으로 넣어 기존과 같은 깊이 우선 순서 유지)
+    stack: List[Tuple[Any, List[str]]] = [(data, current_path)]
+    while stack:
+        node, path = stack.pop()
+        if isinstance(node, dict):
+            children = [(value, path + [key]) for key, value in node.items()]
+        elif isinstance(node, list):
             # 배열 인덱스를 경로에 추가
-            new_path = current_path + [f"[{idx}]"]
-            if isinstance(item, (dict, list)):
-                results.extend(_build_json_path_with_indices(item, new_path))
-            else:
-                # 리프 노드
-                results.append((new_path, item))
-    else:
-        # 리프 노드 (문자열, 숫자 등)
-        results.append((current_path, data))
-    
-    return results
-
-
-def _json_path_to_xpath(json_path: List[str], base_tag: str) -> str:
-    """JSON 경로를 XPath로 변환합니다.
-    
-    Args:
-        json_path: JSON 경로 리스트 (base_tag 제외, 배열 인덱스 포함)
-        base_tag: base 태그 (예: "IMM_0800")
-    
-    Returns:
-        XPath 문자열 (예: "./Page1/ApplyFor/CheckBox1" 또는 "./Page1/KeepPageSeparate[1]/FamilyMember")
-    
-    예:
-        ["Page1", "ApplyFor", "CheckBox1"] -> "./Page1/ApplyFor/CheckBox1"
-        ["Page1", "KeepPageSeparate", "[0]", "FamilyMember"] -> "./Page1/KeepPageSeparate[1]/FamilyMember"
-    """
-    if not json_path:
-        return f"./{base_tag}"
-    
-    xpath_parts = []
-    
-    for part in json_path:
-        if part.startswith("[") and part.endswith("]"):
-            # 배열 인덱스는 이전 경로에 추가 (1-based로 변환)
-            if xpath_parts:
-                idx = int(part[1:-1])
-                xpath_parts[-1] = f"{xpath_parts[-1]}[{idx + 1}]"
+            children = [(item, path + [f"[{idx}]"]) for idx, item in enumerate(node)]
         else:
-            xpath_parts.append(part)
+            # 리프 노드 (문자열, 숫자 등)
+            results.append((path, node))
+            continue
+        stack.extend(reversed(children))
     
-    return "./" + "/".join(xpath_parts)
+    return results
 
 
 def fill_pdf_with_data(
@@ -257,89 +265,75 @@ def fill_pdf_with_data(
         )
     
     try:
-        # 1) datasets.xml 읽기 및 base 노드 찾기
-        datasets_bytes = read_datasets_from_pdf(pdf_path)
-        datasets_root = parse_xml(datasets_bytes)
-        
-        # base_node를 datasets_root에서 직접 찾기 (같은 트리에서)
-        _, base_tag = _find_base_form_node(datasets_bytes)
-        
-        if not base_tag:
-            raise ValueError("datasets.xml에서 base 태그를 찾을 수 없습니다.")
-        
-        # datasets_root에서 base_node 찾기
-        base_node = None
-        # data 노드 우선 확인
-        data_nodes = datasets_root.xpath("//*[local-name()='data']")
-        if data_nodes and len(data_nodes) > 0:
-            data_node = data_nodes[0]
-            children = [c for c in data_node if isinstance(c.tag, str)]
-            if children and strip_ns(children[0].tag) == base_tag:
-                base_node = children[0]
-        
-        # data 노드에서 못 찾으면 form 노드 확인
-        if base_node is None:
-            form_nodes = datasets_root.xpath("//*[local-name()='form']")
-            if form_nodes and strip_ns(form_nodes[0].tag) == base_tag:
-                base_node = form_nodes[0]
-        
-        # 그것도 없으면 루트의 첫 번째 자식 확인
-        if base_node is None:
-            for child in datasets_root:
-                if isinstance(child.tag, str) and strip_ns(child.tag) == base_tag:
-                    base_node = child
-                    break
-        
-        if base_node is None:
-            raise ValueError(f"datasets.xml에서 '{base_tag}' 노드를 찾을 수 없습니다.")
-        
-        # 2) JSON 데이터를 순회하면서 XPath 생성하고 값 설정
-        json_paths = _build_json_path_with_indices(fields)
-        
-        success_count = 0
-        fail_count = 0
-        
-        for json_path, value in json_paths:
+        # PDF는 한 번만 열어서 datasets 읽기 → 수정 → 교체 → 저장까지 처리
+        with pikepdf.open(str(pdf_path)) as pdf:
+            # 1) datasets.xml 읽기 및 base 노드 찾기
+            # datasets 패킷 위치는 한 번만 찾고, 저장할 때 그대로 재사용
+            xfa_handle = get_xfa_handle(pdf)
+            datasets_bytes = read_datasets(xfa_handle)
+            datasets_root = parse_xml(datasets_bytes)
+            
+            # base_node를 datasets_root에서 직접 찾기 (datasets를 다시 파싱하지 않고 같은 트리에서)
+            base_node, base_tag = _find_base_form_node_in_root(datasets_root)
+            
+            if not base_tag:
+                raise ValueError("datasets.xml에서 base 태그를 찾을 수 없습니다.")
+            
+            # 2) JSON 데이터를 순회하면서 XPath 생성하고 값 설정
+            json_paths = _build_json_path_with_indices(fields)
+            
+            # 기존 노드 경로 인덱스 (필드마다 트리를 다시 순회하지 않도록 한 번만 생성)
+            path_index = build_path_index(base_node)
+            
+            success_count = 0
+            fail_count = 0
+            
+            for json_path, value in json_paths:
+                try:
+                    # base_tag 확인 및 제거
+                    if not json_path:
+                        continue
+                    
+                    # base_tag 확인: JSON의 첫 번째 키가 base_tag와 일치해야 함
+                    # 하지만 JSON에는 실제 폼 태그(IMM_0800)가 있고, datasets.xml에는 data 노드 아래에 있을 수 있음
+                    # 따라서 JSON의 첫 번째 키를 그대로 사용
+                    json_base_tag = json_path[0] if json_path else None
+                    if not json_base_tag:
+                        continue
+                    
+                    # JSON의 첫 번째 키(base_tag) 제거
+                    # base_node는 이미 실제 데이터 노드(IMM_0800)이므로 JSON의 base_tag만 제거
+                    json_path_without_base = json_path[1:]
+                    
+                    if not json_path_without_base:
+                        continue
+                    
+                    # 값 설정
+                    str_value = "" if value is None else str(value)
+                    
+                    # set_node 호출 - 노드가 없으면 생성
+                    _set_or_create_node(base_node, json_path_without_base, str_value, path_index)
+                    success_count += 1
+                    
+                except Exception as e:
+                    logger.warning(f"필드 설정 실패: 경로={json_path}, 값={value}, 오류={e}")
+                    fail_count += 1
+            
+            logger.info(f"PDF 필드 채우기 완료: 성공={success_count}, 실패={fail_count}")
+            
+            # 3) datasets.xml을 PDF에 저장
+            updated_datasets = serialize_xml(datasets_root)
+            
+            # 요청마다 고유한 출력 파일 사용 (같은 템플릿을 동시에 채워도 저장/삭제가 서로 겹치지 않음)
+            output_path = upload_dir / f"filled_{uuid.uuid4().hex}_{filename}"
+            write_datasets(xfa_handle, updated_datasets)
             try:
-                # base_tag 확인 및 제거
-                if not json_path:
-                    continue
-                
-                # base_tag 확인: JSON의 첫 번째 키가 base_tag와 일치해야 함
-                # 하지만 JSON에는 실제 폼 태그(IMM_0800)가 있고, datasets.xml에는 data 노드 아래에 있을 수 있음
-                # 따라서 JSON의 첫 번째 키를 그대로 사용
-                json_base_tag = json_path[0] if json_path else None
-                if not json_base_tag:
-                    continue
-                
-                # JSON의 첫 번째 키(base_tag) 제거
-                # base_node는 이미 실제 데이터 노드(IMM_0800)이므로 JSON의 base_tag만 제거
-                json_path_without_base = json_path[1:]
-                
-                if not json_path_without_base:
-                    continue
-                
-                # JSON 경로를 XPath로 변환
-                xpath = _json_path_to_xpath(json_path_without_base, base_tag)
-                
-                # 값 설정
-                str_value = "" if value is None else str(value)
-                
-                # set_node 호출 - 노드가 없으면 생성
-                _set_or_create_node(base_node, json_path_without_base, str_value)
-                success_count += 1
-                
-            except Exception as e:
-                logger.warning(f"필드 설정 실패: 경로={json_path}, 값={value}, 오류={e}")
-                fail_count += 1
-        
-        logger.info(f"PDF 필드 채우기 완료: 성공={success_count}, 실패={fail_count}")
-        
-        # 3) datasets.xml을 PDF에 저장
-        updated_datasets = serialize_xml(datasets_root)
-        
-        output_path = upload_dir / f"filled_{filename}"
-        write_datasets_to_pdf(pdf_path, updated_datasets, output_path)
+                pdf.save(str(output_path), static_id=True, linearize=False)
+            except Exception:
+                # 저장 중 실패하면 만들다 만 파일 정리
+                if output_path.exists():
+                    output_path.unlink()
+                raise
 
         if background_tasks:
             background_tasks.add_task(os.remove, output_path)
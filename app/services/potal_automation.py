@@ -1,10 +1,15 @@
 """브라우저 자동화 서비스"""
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext
 import asyncio
+import gzip
 import os
 import logging
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional, List, Tuple, Dict, Any, Callable
+from typing import Optional, List, Tuple, Dict, Any, Callable, Union
+
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -232,47 +237,245 @@ EE_PORTAL_FORM_ITEMS = [
     }
 ]
 
+
+def _normalize_form_items(form_items: List[Dict[str, Any]]) -> Tuple[Tuple[Dict[str, Any], str, str, str, str, str], ...]:
+    """
+    폼 항목 리스트를 (원본 항목, tag, name, type, value, CSS 선택자) 튜플로 정규화
+    
+    항목마다 dict 조회와 name 선택자 생성을 반복하지 않도록 미리 만들어 둡니다.
+    """
+    normalized = []
+    for item in form_items:
+        field_name = item.get("name", "")
+        selector = f"input[name='{field_name}'], select[name='{field_name}']" if field_name else ""
+        normalized.append((item, item.get("tag", "input"), field_name, item.get("type", "text"), item.get("value", ""), selector))
+    return tuple(normalized)
+
+
+# 하드코딩된 폼 데이터는 모듈 로드 시 한 번만 정규화 (fill_form_sequential에 그대로 전달)
+NORMALIZED_PROFILE_FORM_DATA = _normalize_form_items(PROFILE_FORM_DATA)
+NORMALIZED_EE_PORTAL_FORM_ITEMS = _normalize_form_items(EE_PORTAL_FORM_ITEMS)
+
+def _is_batch_fillable(tag: str, field_name: str, field_type: str) -> bool:
+    """fill_form_sequential에서 일괄 입력(_FORM_FILL_JS)으로 처리할 항목인지 확인 (select, text input)"""
+    return bool(field_name) and (tag == "select" or (tag == "input" and field_type == "text"))
+
+
+# 폼 입력용 JavaScript 헬퍼 (컨텍스트 init script로 페이지마다 한 번만 등록)
+# - 매 호출마다 긴 함수 문자열을 보내 파싱하지 않고, 등록된 window.__pdfFill 함수를 호출
+# - 이벤트 옵션 객체는 한 번만 만들어 재사용
+# - click은 발생시키지 않음 (Angular digest 중복 방지)
+# - fillFields(fields): [[name, tag, type, value], ...]
+#   정확히 일치하는 요소/옵션/라디오만 처리하고, 처리하지 못한 필드 이름을 반환
+_FORM_HELPERS_INIT_JS = """
+    window.__pdfFill = window.__pdfFill || (() => {
+        const init = { bubbles: true };
+        const dispatch = (el) => {
+            for (const type of ['input', 'change']) {
+                el.dispatchEvent(new Event(type, init));
+            }
+        };
+        return {
+            setValue(element, value) {
+                element.value = value;
+                dispatch(element);
+            },
+            fillFields(fields) {
+                const missing = [];
+                for (const [name, tag, type, value] of fields) {
+                    const escaped = CSS.escape(name);
+                    if (tag === 'input' && type === 'radio') {
+                        const radio = Array.from(document.querySelectorAll(`input[name="${escaped}"][type="radio"]`))
+                            .find(r => (r.getAttribute('value') || '').trim() === value);
+                        if (!radio) { missing.push(name); continue; }
+                        if (!radio.checked) radio.click();
+                        continue;
+                    }
+                    let el = null;
+                    if (tag === 'select' || tag === 'selection') {
+                        el = document.querySelector(`select[name="${escaped}"]`);
+                        const index = el ? Array.from(el.options).findIndex(o =>
+                            (o.getAttribute('value') || '').trim() === value || (o.textContent || '').trim() === value) : -1;
+                        if (index < 0) { missing.push(name); continue; }
+                        el.selectedIndex = index;
+                    } else if (tag === 'input' && type !== 'checkbox') {
+                        el = document.querySelector(`input[name="${escaped}"]`);
+                        if (!el) { missing.push(name); continue; }
+                        el.value = value;
+                    } else {
+                        missing.push(name);
+                        continue;
+                    }
+                    dispatch(el);
+                }
+                return missing;
+            }
+        };
+    })();
+"""
+
+# JavaScript로 값 설정 후 이벤트 발생 (fill() 실패 시 대체 방법)
+_SET_VALUE_JS = "(element, value) => window.__pdfFill.setValue(element, value)"
+
+# 폼 필드 일괄 입력 (한 번의 호출로 모든 필드 처리)
+_FORM_FILL_JS = "(fields) => window.__pdfFill.fillFields(fields)"
+
+# Save 버튼 선택자 (대소문자 무시 텍스트 매칭을 브라우저에서 한 번에 처리, XPath translate() 불필요)
+_SAVE_BUTTON_SELECTOR = "button:text-matches('save|저장', 'i')"
+
+# 로그인 페이지 준비 조건 (문서 로드 완료 + 화면에 입력 필드가 렌더링됨)
+_LOGIN_PAGE_READY_JS = "() => document.readyState === 'complete' && !!document.querySelector('input:not([type=hidden])')"
+
+# find_element_safe 기본 대기 시간 (밀리초)
+# (클릭/입력 등 액션 timeout은 Playwright 기본값 유지 - 느린 포털 응답 대비)
+_FIND_TIMEOUT = 10000
+
+# 폼 입력과 무관한 분석/광고 요청 차단 패턴 (페이지 로드 및 메인 스레드 JS 감소)
+# (스크린샷이 실제 화면과 같아야 하므로 이미지/폰트는 차단하지 않음)
+# context.route()는 컨텍스트의 HTTP 캐시를 끄므로, 페이지별 CDP Network.setBlockedURLs로 차단
+_BLOCKED_URLS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*facebook.com*",
+    "*facebook.net*",
+    "*hotjar.com*",
+]
+
+# 디버깅 정보 저장 시 덤프할 DOM 범위 (전체 페이지 대신 폼 영역만)
+_DEBUG_DOM_JS = "() => (document.querySelector('form') || document.body).outerHTML"
+
+# 한 세션에서 같은 prefix의 디버깅 정보는 이 간격(초) 안에 한 번만 저장 (오류 반복 시 디스크 I/O 방지)
+_DEBUG_DUMP_INTERVAL = 60.0
+
+# 도커 환경의 Chromium 경로 (모듈 로드 시 한 번만 확인)
+_DOCKER_CHROMIUM_PATH = "/usr/bin/chromium" if os.path.exists("/usr/bin/chromium") else None
+
+# 프로세스 전체에서 공유하는 Playwright 드라이버
+# (인스턴스마다 드라이버 프로세스를 새로 띄우지 않도록 한 번만 시작)
+_shared_playwright = None
+_shared_playwright_lock: Optional[asyncio.Lock] = None
+
+
+async def _get_shared_playwright():
+    """공유 Playwright 드라이버 반환 (최초 호출 시에만 시작)"""
+    global _shared_playwright, _shared_playwright_lock
+    if _shared_playwright_lock is None:
+        _shared_playwright_lock = asyncio.Lock()
+    async with _shared_playwright_lock:
+        if _shared_playwright is None:
+            _shared_playwright = await async_playwright().start()
+            logger.info("Playwright 드라이버가 시작되었습니다.")
+    return _shared_playwright
+
+
+async def shutdown_playwright():
+    """공유 Playwright 드라이버 종료 (애플리케이션 종료 시 호출)"""
+    global _shared_playwright
+    if _shared_playwright is not None:
+        try:
+            await _shared_playwright.stop()
+            logger.info("Playwright 드라이버가 종료되었습니다.")
+        except Exception as e:
+            logger.error(f"Playwright 드라이버 종료 중 오류: {str(e)}")
+        finally:
+            _shared_playwright = None
+
 class BrowserAutomation:
-    def __init__(self):
-        """브라우저 자동화 클래스 초기화"""
+    def __init__(self, block_images: Optional[bool] = None, headless: Optional[bool] = None):
+        """
+        브라우저 자동화 클래스 초기화
+        
+        Args:
+            block_images: 이미지 로딩 차단 여부 (None이면 settings.browser_block_images, 스크린샷이 필요 없는 작업에서 페이지 로드 단축)
+            headless: 헤드리스 모드 여부 (None이면 settings.browser_headless, 그것도 없으면 도커 환경에서만 헤드리스)
+        """
+        self.block_images = block_images
+        self.headless = headless
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        # (URL, 선택자) 별로 찾은 Save 버튼 Locator 캐시
+        self._save_button_cache: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Any] = {}
+        # prefix별 마지막 디버깅 정보 저장 시각 (세션마다 따로 관리, reset 시 초기화)
+        self._last_debug_dump: Dict[str, float] = {}
     
     @classmethod
-    async def create(cls):
+    async def create(cls, block_images: Optional[bool] = None, headless: Optional[bool] = None, with_context: bool = True):
         """비동기 팩토리 메서드로 브라우저 자동화 인스턴스 생성"""
-        instance = cls()
-        await instance.setup_browser()
+        instance = cls(block_images=block_images, headless=headless)
+        await instance.setup_browser(with_context=with_context)
         return instance
     
-    async def setup_browser(self):
-        """Playwright 브라우저 설정"""
-        self.playwright = await async_playwright().start()
+    async def setup_browser(self, with_context: bool = True):
+        """
+        Playwright 브라우저 설정
+        
+        Args:
+            with_context: 컨텍스트와 페이지까지 만들지 여부 (브라우저 풀은 브라우저만 실행하고 세션은 new_session()으로 생성)
+        """
+        # 공유 드라이버 사용 (이미 시작되어 있으면 재사용)
+        self.playwright = await _get_shared_playwright()
         
         # 도커 환경 감지
-        is_docker = os.path.exists("/usr/bin/chromium")
+        is_docker = _DOCKER_CHROMIUM_PATH is not None
+        
+        # 헤드리스 여부 결정 (인스턴스 설정 > 환경 설정 > 도커 환경에서만 헤드리스)
+        headless = self.headless
+        if headless is None:
+            headless = settings.browser_headless
+        if headless is None:
+            headless = is_docker
         
         # 브라우저 옵션 설정
         browser_type = "chromium"
         launch_options = {
-            "headless": is_docker,  # 도커 환경에서만 헤드리스
+            "headless": headless,
             "args": [
-                "--start-maximized",
                 "--disable-blink-features=AutomationControlled",
                 "--disable-dev-shm-usage",
                 "--no-sandbox",
+                "--disable-notifications",  # 알림 권한 팝업 차단
             ]
         }
         
+        if headless:
+            # 서버 실행 시 GPU/컴포지터 자원 사용 안 함 (창 크기는 컨텍스트 viewport로 지정)
+            launch_options["args"].append("--disable-gpu")
+        else:
+            launch_options["args"].append("--start-maximized")
+        
+        # 이미지 차단 여부 결정 (인스턴스 설정 > 환경 설정)
+        block_images = self.block_images
+        if block_images is None:
+            block_images = settings.browser_block_images
+        
+        if block_images:
+            # 이미지 로딩 비활성화 (폼 입력에는 불필요, 전송량 및 로드 시간 감소)
+            launch_options["args"].append("--blink-settings=imagesEnabled=false")
+        
         if is_docker:
-            launch_options["executable_path"] = "/usr/bin/chromium"
+            launch_options["executable_path"] = _DOCKER_CHROMIUM_PATH
+        
+        # 브라우저 실행 (원격 엔드포인트가 설정되어 있으면 원격 브라우저에 연결)
+        if settings.browser_ws_endpoint:
+            # 원격 브라우저는 서버 쪽 실행 옵션을 따르므로 헤드리스/이미지 차단 설정이 적용되지 않음
+            if self.headless is not None or settings.browser_headless is not None or block_images:
+                logger.warning("원격 브라우저(BROWSER_WS_ENDPOINT) 사용 시 헤드리스/이미지 차단 설정은 적용되지 않습니다.")
+            self.browser = await self.playwright.chromium.connect(settings.browser_ws_endpoint)
+            logger.info(f"원격 브라우저에 연결: {settings.browser_ws_endpoint}")
+        else:
+            self.browser = await self.playwright.chromium.launch(**launch_options)
         
-        # 브라우저 실행
-        self.browser = await self.playwright.chromium.launch(**launch_options)
+        # 컨텍스트 및 페이지 생성
+        if with_context:
+            await self._setup_context()
         
-        # 컨텍스트 생성 (시크릿 모드)
+        logger.info("브라우저가 성공적으로 시작되었습니다.")
+    
+    async def _setup_context(self):
+        """새 브라우저 컨텍스트(시크릿 모드)와 페이지 생성"""
         context_options = {
             "viewport": {"width": 1920, "height": 1080},
             "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -287,26 +490,75 @@ class BrowserAutomation:
             });
         """)
         
+        # 폼 입력 헬퍼 등록 (새 문서마다 한 번만 파싱됨)
+        await self.context.add_init_script(_FORM_HELPERS_INIT_JS)
+        
         # 페이지 생성
         self.page = await self.context.new_page()
+        await self._block_tracking_requests(self.page)
+    
+    async def _block_tracking_requests(self, page: Page):
+        """
+        페이지의 분석/광고 요청 차단
         
-        logger.info("브라우저가 성공적으로 시작되었습니다.")
+        context.route()와 달리 HTTP 캐시를 유지하므로, 여러 페이지를 이동하는 흐름에서도
+        포털 정적 리소스를 매번 다시 받지 않습니다. (CDP를 지원하지 않는 브라우저면 생략)
+        """
+        try:
+            cdp = await self.context.new_cdp_session(page)
+            await cdp.send("Network.enable")
+            await cdp.send("Network.setBlockedURLs", {"urls": _BLOCKED_URLS})
+        except Exception as e:
+            logger.debug(f"요청 차단 설정 생략: {str(e)}")
+    
+    async def new_session(self) -> "BrowserAutomation":
+        """
+        같은 브라우저 프로세스에서 새 컨텍스트(쿠키, 스토리지, 캐시가 비어 있음)를 가진 세션 인스턴스 생성
+        
+        세션마다 별도 인스턴스를 돌려주므로, 반환된 뒤에도 남아 있는 참조(취소되지 않은 태스크 등)는
+        닫힌 자기 컨텍스트에만 접근하고 다음 사용자의 세션에는 닿지 않습니다.
+        """
+        session = BrowserAutomation(block_images=self.block_images, headless=self.headless)
+        session.playwright = self.playwright
+        session.browser = self.browser
+        await session._setup_context()
+        return session
+    
+    async def close_session(self):
+        """이 세션의 컨텍스트(와 페이지)만 닫음 (브라우저 프로세스는 유지)"""
+        context = self.context
+        self.page = None
+        self.context = None
+        if context:
+            await context.close()
     
     async def save_debug_info(self, filename_prefix="debug"):
-        """디버깅 정보 저장 (스크린샷 및 페이지 소스)"""
+        """
+        디버깅 정보 저장 (스크린샷 및 폼 영역 HTML)
+        
+        페이지 전체 대신 첫 번째 form(없으면 body)의 HTML만 gzip으로 저장하며,
+        같은 세션에서 같은 prefix는 저장에 성공한 뒤 _DEBUG_DUMP_INTERVAL 초 동안 다시 저장하지 않습니다.
+        """
+        last_dump = self._last_debug_dump.get(filename_prefix)
+        if last_dump is not None and time.monotonic() - last_dump < _DEBUG_DUMP_INTERVAL:
+            logger.debug(f"디버깅 정보 저장 생략 (최근 저장됨): {filename_prefix}")
+            return None, None
+        
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             screenshot_path = f"{filename_prefix}_screenshot_{timestamp}.png"
-            html_path = f"{filename_prefix}_page_source_{timestamp}.html"
+            html_path = f"{filename_prefix}_page_source_{timestamp}.html.gz"
             
             await self.page.screenshot(path=screenshot_path, full_page=True)
             logger.info(f"스크린샷 저장: {screenshot_path}")
             
-            content = await self.page.content()
-            with open(html_path, 'w', encoding='utf-8') as f:
+            content = await self.page.evaluate(_DEBUG_DOM_JS)
+            with gzip.open(html_path, 'wt', encoding='utf-8') as f:
                 f.write(content)
             logger.info(f"페이지 소스 저장: {html_path}")
             
+            # 저장에 성공한 경우에만 기록 (실패하면 다음 호출에서 다시 시도)
+            self._last_debug_dump[filename_prefix] = time.monotonic()
             return screenshot_path, html_path
         except Exception as e:
             logger.error(f"디버깅 정보 저장 실패: {str(e)}")
@@ -324,55 +576,68 @@ class BrowserAutomation:
         Returns:
             찾은 요소 Locator 또는 None
         """
-        # 각 선택자마다 짧은 timeout으로 시도 (전체 timeout을 나눠서 사용)
-        per_selector_timeout = min(timeout // len(selectors) if selectors else timeout, 3000)  # 최대 3초
-        
+        locators = []
         for selector_type, value in selectors:
+            if selector_type == "name":
+                locators.append((selector_type, value, self.page.locator(f"input[name='{value}']")))
+            elif selector_type == "id":
+                locators.append((selector_type, value, self.page.locator(f"#{value}")))
+            elif selector_type == "css":
+                locators.append((selector_type, value, self.page.locator(value)))
+            elif selector_type == "xpath":
+                locators.append((selector_type, value, self.page.locator(f"xpath={value}")))
+        
+        if not locators:
+            return None
+        
+        # 1단계: 대기 없이 모든 선택자를 즉시 확인 (첫 번째로 찾은 요소 반환)
+        first_attached = None
+        for selector_type, value, locator in locators:
             try:
-                logger.info(f"요소 찾기 시도: {selector_type}={value}")
-                
-                if selector_type == "name":
-                    locator = self.page.locator(f"input[name='{value}']")
-                elif selector_type == "id":
-                    locator = self.page.locator(f"#{value}")
-                elif selector_type == "css":
-                    locator = self.page.locator(value)
-                elif selector_type == "xpath":
-                    locator = self.page.locator(f"xpath={value}")
-                else:
-                    continue
-                
-                # 요소가 존재하는지 빠르게 확인
-                count = await locator.count()
-                if count == 0:
+                if await locator.count() == 0:
                     logger.debug(f"요소를 찾을 수 없음: {selector_type}={value}")
                     continue
                 
-                if wait_for_clickable:
-                    try:
-                        await locator.first.wait_for(state="visible", timeout=per_selector_timeout)
-                        if await locator.first.is_visible():
-                            logger.info(f"요소 찾기 성공: {selector_type}={value}")
-                            return locator.first
-                    except Exception as e:
-                        logger.debug(f"요소가 보이지 않음 ({selector_type}={value}): {str(e)}")
-                        continue
-                else:
-                    # 요소가 존재하면 바로 반환 (보이는지 확인은 선택적)
-                    try:
-                        # 짧은 시간 내에 보이는지 확인 시도
-                        await locator.first.wait_for(state="visible", timeout=1000)
-                    except:
-                        pass  # 보이지 않아도 계속 진행 (attached 상태면 충분)
-                    
+                # 클릭 가능 여부가 필요하면 지금 보이는 요소만 바로 반환
+                if not wait_for_clickable or await locator.first.is_visible():
                     logger.info(f"요소 찾기 성공: {selector_type}={value}")
                     return locator.first
+                
+                if first_attached is None:
+                    first_attached = (selector_type, value, locator)
             except Exception as e:
                 logger.debug(f"요소 찾기 실패 ({selector_type}={value}): {str(e)}")
-                continue
+        
+        # 2단계: 한 번만 대기
+        # (DOM에 있지만 아직 보이지 않는 요소가 있으면 그 요소, 없으면 모든 선택자의 합집합 - 먼저 나타나는 요소)
+        if first_attached:
+            selector_type, value, locator = first_attached
+        else:
+            selector_type, value, locator = "union", ", ".join(f"{t}={v}" for t, v, _ in locators), locators[0][2]
+            for _, _, other in locators[1:]:
+                locator = locator.or_(other)
+        try:
+            logger.info(f"요소 대기 중: {selector_type}={value}")
+            await locator.first.wait_for(state="visible" if wait_for_clickable else "attached", timeout=timeout)
+            logger.info(f"요소 찾기 성공: {selector_type}={value}")
+            return locator.first
+        except Exception as e:
+            logger.debug(f"요소 찾기 실패 ({selector_type}={value}): {str(e)}")
         
         return None
     
+    async def _fast_type(self, element, text: str):
+        """
+        키 이벤트를 글자마다 보내지 않고 텍스트를 한 번에 입력 (CDP Input.insertText)
+        
+        Args:
+            element: 입력할 Locator
+            text: 입력할 텍스트
+        """
+        await element.click()
+        await element.press("ControlOrMeta+a")
+        await self.page.keyboard.insert_text(text)
+    
     async def login(self, url: str, email: str, password: str, 
               email_selectors: Optional[List[Tuple[str, str]]] = None, 
               password_selectors: Optional[List[Tuple[str, str]]] = None, 
@@ -394,8 +659,6 @@ class BrowserAutomation:
             current_url = self.page.url
             if current_url == url or url in current_url:
                 logger.info(f"이미 로그인 페이지에 있습니다. URL: {current_url}")
-                # 페이지가 이미 로드되어 있으므로 최소 대기만 수행
-                await asyncio.sleep(0.1)
             else:
                 # 페이지 로드 (재시도 로직 포함)
                 # IRCC가 URL을 리다이렉트할 수 있으므로 domcontentloaded 사용
@@ -405,16 +668,6 @@ class BrowserAutomation:
                         # domcontentloaded로 먼저 로드 (리다이렉트 허용)
                         await self.page.goto(url, wait_until="domcontentloaded", timeout=60000)
                         logger.info(f"페이지 로드 완료: {url} (현재 URL: {self.page.url})")
-                        
-                        # 리다이렉트 후 페이지 안정화를 위한 추가 대기
-                        await asyncio.sleep(0.2)
-                        
-                        # load 상태 확인 (선택적, 실패해도 계속 진행)
-                        try:
-                            await self.page.wait_for_load_state("load", timeout=5000)
-                        except:
-                            logger.debug("load 상태 대기 시간 초과 (계속 진행)")
-                        
                         break
                     except Exception as e:
                         if retry < max_retries - 1:
@@ -424,13 +677,12 @@ class BrowserAutomation:
                             logger.error(f"페이지 로드 최종 실패: {str(e)}")
                             raise
             
-            # DOM 로드 상태 확인 (networkidle 대신 domcontentloaded 사용)
+            # 페이지 준비 상태를 하나의 조건으로 대기 (load 완료 + 입력 필드 렌더링)
+            # (load / domcontentloaded 를 따로 기다리지 않고 브라우저에서 한 번에 확인)
             try:
-                await self.page.wait_for_load_state("domcontentloaded", timeout=5000)
+                await self.page.wait_for_function(_LOGIN_PAGE_READY_JS, timeout=5000)
             except:
-                logger.debug("domcontentloaded 대기 시간 초과 (리다이렉트로 인한 정상적인 경우일 수 있음, 계속 진행)")
-            
-            await asyncio.sleep(0.1)  # 최소 대기 시간
+                logger.debug("페이지 준비 대기 시간 초과 (리다이렉트로 인한 정상적인 경우일 수 있음, 계속 진행)")
             
             # 기본 선택자
             if email_selectors is None:
@@ -452,9 +704,7 @@ class BrowserAutomation:
                 login_button_selectors = [
                     ("css", 'button[type="submit"]'),
                     ("css", 'input[type="submit"]'),
-                    ("xpath", "//button[@type='submit']"),
-                    ("xpath", "//input[@type='submit']"),
-                    ("xpath", "//button[contains(text(), 'Login') or contains(text(), '로그인') or contains(text(), 'Sign in')]"),
+                    ("css", "button:text-matches('login|sign ?in|로그인', 'i')"),
                     ("css", "button.btn-primary"),
                     ("css", "button.btn-login"),
                     ("id", "login"),
@@ -470,7 +720,7 @@ class BrowserAutomation:
                     break
                 if retry < 2:
                     logger.warning(f"이메일 필드를 찾을 수 없음 (재시도 {retry + 1}/3)")
-                    await asyncio.sleep(0.3)
+                    await asyncio.sleep(0.1)  # 재확인 간격 (0.3초 → 0.1초)
             
             if not email_field:
                 logger.error("이메일 필드를 찾을 수 없습니다. 디버깅 정보를 저장합니다.")
@@ -489,18 +739,10 @@ class BrowserAutomation:
                 except:
                     pass
             
-            # 입력 필드에 포커스
-            await email_field.focus()
-            await asyncio.sleep(0.05)
-            
-            # 기존 값 제거
-            await email_field.clear()
-            await asyncio.sleep(0.05)
-            
             # 값 입력 (여러 방법 시도)
+            # (fill()이 스크롤/포커스/기존 값 제거까지 한 번에 처리)
             try:
                 await email_field.fill(email)
-                await asyncio.sleep(0.1)
                 
                 # 진행 상황 콜백 호출 (이메일 입력 후)
                 if progress_callback:
@@ -518,29 +760,19 @@ class BrowserAutomation:
                     logger.warning(f"입력 값이 일치하지 않음. 기대: {email}, 실제: {input_value}")
                     # JavaScript로 직접 설정 시도
                     try:
-                        await email_field.evaluate(f"""
-                            (element, value) => {{
-                                element.value = value;
-                                element.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                                element.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                            }}
-                        """, email)
-                        await asyncio.sleep(0.1)
+                        await email_field.evaluate(_SET_VALUE_JS, email)
                     except Exception as e:
                         logger.warning(f"JavaScript 입력 실패: {str(e)}")
             except Exception as e:
-                logger.warning(f"fill() 실패, type() 시도: {str(e)}")
-                await email_field.type(email, delay=50)
-                await asyncio.sleep(0.1)
+                logger.warning(f"fill() 실패, 직접 입력 시도: {str(e)}")
+                await self._fast_type(email_field, email)
             
             # 이메일 입력 최종 확인
             final_email = await email_field.input_value()
             if final_email != email:
                 logger.warning(f"이메일 입력 확인 실패. 기대: {email}, 실제: {final_email}")
                 # 재시도
-                await email_field.clear()
                 await email_field.fill(email)
-                await asyncio.sleep(0.1)
             else:
                 logger.info(f"이메일 입력 완료: {email}")
             
@@ -553,7 +785,7 @@ class BrowserAutomation:
                     break
                 if retry < 2:
                     logger.warning(f"비밀번호 필드를 찾을 수 없음 (재시도 {retry + 1}/3)")
-                    await asyncio.sleep(0.3)
+                    await asyncio.sleep(0.1)  # 재확인 간격 (0.3초 → 0.1초)
             
             if not password_field:
                 logger.error("비밀번호 필드를 찾을 수 없습니다. 디버깅 정보를 저장합니다.")
@@ -572,18 +804,10 @@ class BrowserAutomation:
                 except:
                     pass
             
-            # 입력 필드에 포커스
-            await password_field.focus()
-            await asyncio.sleep(0.05)
-            
-            # 기존 값 제거
-            await password_field.clear()
-            await asyncio.sleep(0.05)
-            
             # 값 입력 (여러 방법 시도)
+            # (fill()이 스크롤/포커스/기존 값 제거까지 한 번에 처리)
             try:
                 await password_field.fill(password)
-                await asyncio.sleep(0.2)  # 비밀번호 입력 후 화면 안정화 대기
                 
                 # 진행 상황 콜백 호출 (비밀번호 입력 후 - 스크린샷 촬영을 위해 먼저 호출)
                 if progress_callback:
@@ -605,24 +829,16 @@ class BrowserAutomation:
                         logger.warning(f"비밀번호 입력 길이가 일치하지 않음")
                         # JavaScript로 직접 설정 시도
                         try:
-                            await password_field.evaluate(f"""
-                                (element, value) => {{
-                                    element.value = value;
-                                    element.dispatchEvent(new Event('input', {{ bubbles: true }}));
-                                    element.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                                }}
-                            """, password)
-                            await asyncio.sleep(0.1)
+                            await password_field.evaluate(_SET_VALUE_JS, password)
                         except Exception as e:
                             logger.warning(f"JavaScript 비밀번호 입력 실패: {str(e)}")
                 except:
                     pass  # 비밀번호 필드는 보안상 값을 읽을 수 없을 수 있음
             except Exception as e:
-                logger.warning(f"fill() 실패, type() 시도: {str(e)}")
-                await password_field.type(password, delay=50)
-                await asyncio.sleep(0.2)
+                logger.warning(f"fill() 실패, 직접 입력 시도: {str(e)}")
+                await self._fast_type(password_field, password)
                 
-                # 진행 상황 콜백 호출 (type() 방식으로 입력한 경우)
+                # 진행 상황 콜백 호출 (직접 입력 방식으로 입력한 경우)
                 if progress_callback:
                     try:
                         if asyncio.iscoroutinefunction(progress_callback):
@@ -645,7 +861,7 @@ class BrowserAutomation:
                     break
                 if retry < 2:
                     logger.warning(f"로그인 버튼을 찾을 수 없음 (재시도 {retry + 1}/3)")
-                    await asyncio.sleep(0.3)
+                    await asyncio.sleep(0.1)  # 재확인 간격 (0.3초 → 0.1초)
             
             if not login_btn:
                 logger.error("로그인 버튼을 찾을 수 없습니다. 디버깅 정보를 저장합니다.")
@@ -664,7 +880,9 @@ class BrowserAutomation:
             
             # 스크롤하여 버튼이 보이도록
             await login_btn.scroll_into_view_if_needed()
-            await asyncio.sleep(0.2)
+            
+            # 클릭 전 URL 저장 (로그인 성공 시 URL 변경 감지용)
+            initial_url = self.page.url
             
             # 클릭 (여러 방법 시도)
             clicked = False
@@ -696,24 +914,12 @@ class BrowserAutomation:
                 logger.error("모든 클릭 방법 실패")
                 raise Exception("로그인 버튼 클릭 실패")
             
-            # 로그인 후 페이지 로드 대기
-            await asyncio.sleep(0.3)
-            
-            # URL 변경 감지 (로그인 성공 확인)
-            initial_url = self.page.url
-            max_wait = 3  # 최대 3초 대기 (5초 -> 3초)
-            waited = 0
-            
-            while waited < max_wait:
-                try:
-                    await asyncio.sleep(0.3)  # 0.5초 -> 0.3초로 단축
-                    current_url = self.page.url
-                    if current_url != initial_url:
-                        logger.info(f"페이지 전환 확인: {initial_url} -> {current_url}")
-                        break
-                    waited += 1
-                except:
-                    break
+            # URL 변경 감지 (로그인 성공 확인) - 전환되는 즉시 진행 (최대 3초)
+            try:
+                await self.page.wait_for_url(lambda u: u != initial_url, wait_until="commit", timeout=3000)
+                logger.info(f"페이지 전환 확인: {initial_url} -> {self.page.url}")
+            except:
+                logger.debug("로그인 후 URL 변경 없음 (계속 진행)")
             
             # DOM 로드 상태 확인 (networkidle 대신 domcontentloaded 사용)
             try:
@@ -721,20 +927,16 @@ class BrowserAutomation:
             except:
                 logger.warning("domcontentloaded 대기 시간 초과 (계속 진행)")
             
-            # 추가 대기 (페이지 안정화)
-            await asyncio.sleep(0.1)  # 최소 대기 시간
-            
             # 현재 URL 확인
             current_url = self.page.url
             logger.info(f"로그인 후 현재 URL: {current_url}")
             
             # 로그인 실패 확인 (에러 메시지나 같은 페이지에 머물러 있는지)
             try:
-                # 에러 메시지 확인
-                error_elements = await self.page.locator("text=/error|invalid|incorrect|wrong/i").count()
-                if error_elements > 0:
-                    error_text = await self.page.locator("text=/error|invalid|incorrect|wrong/i").first.text_content()
-                    logger.warning(f"로그인 에러 메시지 발견: {error_text}")
+                # 에러 메시지 확인 (개수 확인과 텍스트 조회를 한 번에 수행)
+                error_texts = await self.page.locator("text=/error|invalid|incorrect|wrong/i").all_text_contents()
+                if error_texts:
+                    logger.warning(f"로그인 에러 메시지 발견: {error_texts[0]}")
             except:
                 pass
             
@@ -780,53 +982,34 @@ class BrowserAutomation:
             if submit_selectors is None:
                 submit_selectors = [
                     ("css", "button[type='submit']"),
-                    ("xpath", "//button[contains(text(), 'Verify') or contains(text(), '확인')]"),
-                    ("xpath", "//button[contains(text(), 'Submit') or contains(text(), '제출')]"),
+                    ("css", "button:text-matches('Verify|확인')"),
+                    ("css", "button:text-matches('Submit|제출')"),
                     ("css", "button.btn-primary"),
                 ]
             
             # 2FA 코드 입력 필드 찾기
-            code_field = None
-            for selector_type, value in code_selectors:
-                try:
-                    if selector_type == "name":
-                        locator = self.page.locator(f"input[name='{value}']")
-                    elif selector_type == "id":
-                        locator = self.page.locator(f"#{value}")
-                    elif selector_type == "css":
-                        locator = self.page.locator(value)
-                    else:
-                        continue
-                    
-                    # 짧은 timeout으로 먼저 시도
-                    try:
-                        await locator.wait_for(state="visible", timeout=min(timeout, 10000))
-                        if await locator.is_visible():
-                            code_field = locator
-                            logger.info(f"2FA 코드 입력 필드 발견: {selector_type}={value}")
-                            break
-                    except:
-                        # 다음 선택자 시도
-                        continue
-                except Exception as e:
-                    logger.debug(f"2FA 필드 찾기 실패 ({selector_type}={value}): {str(e)}")
-                    continue
+            # (선택자마다 따로 대기하지 않고, 즉시 확인 후 모든 선택자를 합쳐 한 번만 대기)
+            code_field = await self.find_element_multiple_ways(code_selectors, timeout=min(timeout, 10000), wait_for_clickable=True)
+            if code_field:
+                logger.info("2FA 코드 입력 필드 발견")
             
             if not code_field:
-                # 페이지 소스를 확인하여 디버깅
-                try:
-                    current_url = self.page.url
-                    page_title = await self.page.title()
-                    logger.info(f"2FA 필드를 찾을 수 없습니다. 현재 URL: {current_url}, 페이지 제목: {page_title}")
-                    
-                    # 페이지에 "code" 또는 "verification" 텍스트가 있는지 확인
-                    page_content = await self.page.content()
-                    if "code" in page_content.lower() or "verification" in page_content.lower():
-                        logger.warning("페이지에 'code' 또는 'verification' 텍스트가 있지만 필드를 찾을 수 없습니다.")
-                        # 디버깅 정보 저장
-                        await self.save_debug_info("2fa_field_not_found")
-                except:
-                    pass
+                logger.info(f"2FA 필드를 찾을 수 없습니다. 현재 URL: {self.page.url}")
+                
+                # 페이지 소스를 확인하여 디버깅 (DEBUG 레벨에서만 - 2FA가 없는 정상 경로에서 전체 DOM 직렬화 방지)
+                if logger.isEnabledFor(logging.DEBUG):
+                    try:
+                        page_title = await self.page.title()
+                        logger.debug(f"2FA 필드 없음 - 페이지 제목: {page_title}")
+                        
+                        # 페이지에 "code" 또는 "verification" 텍스트가 있는지 확인
+                        page_content = await self.page.content()
+                        if "code" in page_content.lower() or "verification" in page_content.lower():
+                            logger.warning("페이지에 'code' 또는 'verification' 텍스트가 있지만 필드를 찾을 수 없습니다.")
+                            # 디버깅 정보 저장
+                            await self.save_debug_info("2fa_field_not_found")
+                    except:
+                        pass
                 
                 logger.info("2FA 코드 입력 필드를 찾을 수 없습니다. (2FA가 필요하지 않을 수 있습니다)")
                 return True  # 2FA가 필요 없으면 성공으로 처리
@@ -838,8 +1021,6 @@ class BrowserAutomation:
             
             # 코드 입력
             logger.info("2FA 코드 입력 중...")
-            await code_field.clear()
-            await asyncio.sleep(0.1)
             await code_field.fill(code)
             logger.info("2FA 코드 입력 완료")
             
@@ -988,11 +1169,10 @@ class BrowserAutomation:
             
             # 방법 1: Question-label 클래스 찾기 (우선)
             question_label = self.page.locator(".Question-label, [class*='Question-label'], [class*='question-label']")
-            question_count = await question_label.count()
+            question_texts = await question_label.all_text_contents()
             
-            if question_count > 0:
-                question_text = await question_label.first.text_content()
-                question_text = question_text.strip() if question_text else ""
+            if question_texts:
+                question_text = question_texts[0].strip()
                 logger.info(f"Question-label에서 질문 발견: {question_text}")
             
             # 방법 2: answer 필드가 있고 Question-label이 없으면 answer 필드 근처의 label 찾기
@@ -1003,12 +1183,11 @@ class BrowserAutomation:
                 if answer_count > 0:
                     # answer 필드 근처의 label 찾기
                     nearby_labels = answer_field.locator("xpath=./ancestor::*//label | ./preceding-sibling::label | ./parent::*/label")
-                    label_count = await nearby_labels.count()
+                    label_texts = await nearby_labels.all_text_contents()
                     
-                    if label_count > 0:
+                    if label_texts:
                         # 첫 번째 label을 질문으로 사용
-                        question_text = await nearby_labels.first.text_content()
-                        question_text = question_text.strip() if question_text else ""
+                        question_text = label_texts[0].strip()
                         logger.info(f"answer 필드 근처에서 질문 발견: {question_text}")
             
             # 질문이 있으면 처리
@@ -1034,9 +1213,6 @@ class BrowserAutomation:
                     }
                 
                 logger.info(f"answer 필드에 답변 입력 중: {answer}")
-                await answer_field.first.scroll_into_view_if_needed()
-                await asyncio.sleep(0.3)
-                await answer_field.first.clear()
                 await answer_field.first.fill(answer)
                 logger.info("답변 입력 완료")
                 
@@ -1438,14 +1614,14 @@ class BrowserAutomation:
             await self.save_debug_info("navigate_to_ee_error")
             raise
     
-    async def find_element_safe(self, selector_type: str, value: str, timeout: int = 10000):
+    async def find_element_safe(self, selector_type: str, value: str, timeout: Optional[int] = None):
         """
         안전하게 요소를 찾는 함수
         
         Args:
             selector_type: 찾을 방법 ("name", "id", "css", "xpath")
             value: 찾을 값
-            timeout: 대기 시간 (밀리초)
+            timeout: 대기 시간 (밀리초, None이면 _FIND_TIMEOUT)
         
         Returns:
             찾은 요소 Locator 또는 None
@@ -1462,14 +1638,33 @@ class BrowserAutomation:
             else:
                 return None
             
-            await locator.wait_for(state="attached", timeout=timeout)
-            if await locator.count() > 0:
-                return locator
-            return None
+            # 요소가 DOM에 붙을 때까지 브라우저 쪽에서 대기 (한 번의 호출)
+            # 같은 name을 가진 요소가 여러 개(라디오 그룹 등)여도 동작하도록 첫 번째 요소 기준으로 대기하고 반환
+            element = locator.first
+            await element.wait_for(state="attached", timeout=timeout if timeout is not None else _FIND_TIMEOUT)
+            return element
         except Exception as e:
             logger.debug(f"요소를 찾을 수 없습니다 ({selector_type}={value}): {str(e)}")
             return None
     
+    async def _get_select_options(self, element) -> List[Tuple[str, str]]:
+        """
+        셀렉트 박스의 모든 옵션을 한 번의 JavaScript 호출로 가져오는 함수
+        
+        Args:
+            element: select 요소 Locator
+        
+        Returns:
+            [(option_value, option_text), ...] 형태의 리스트 (앞뒤 공백 제거)
+        """
+        options = await element.evaluate("""
+            (select) => Array.from(select.options).map(o => [
+                (o.getAttribute('value') || '').trim(),
+                (o.textContent || '').trim()
+            ])
+        """)
+        return [(option_value, option_text) for option_value, option_text in options]
+    
     async def fill_form_fields(self, form_data: Dict[str, Any], progress_callback: Optional[Callable] = None):
         """
         JSON 형식의 폼 데이터를 받아서 필드에 입력하는 함수
@@ -1481,10 +1676,25 @@ class BrowserAutomation:
         try:
             logger.info("\n=== 폼 필드 입력 시작 ===")
             
-            total_fields = len(form_data)
+            # 필드 정보 정규화 (name, tag, type, value)
+            fields = [
+                (field_name, field_info.get("tag", "input"), field_info.get("type", "text"),
+                 field_info.get("value") or field_info.get("Value", ""))
+                for field_name, field_info in form_data.items()
+            ]
+            
+            # 1차: 한 번의 JavaScript 호출로 모든 필드 일괄 입력
+            try:
+                missing = set(await self.page.evaluate(_FORM_FILL_JS, [list(field) for field in fields]))
+                logger.info(f"  일괄 입력 완료: {len(fields) - len(missing)}/{len(fields)}개 (개별 처리 필요: {len(missing)}개)")
+            except Exception as e:
+                logger.warning(f"  ⚠️ 일괄 입력 실패, 개별 입력으로 진행: {str(e)}")
+                missing = {field_name for field_name, _, _, _ in fields}
+            
+            total_fields = len(fields)
             current_field = 0
             
-            for field_name, field_info in form_data.items():
+            for field_name, tag, field_type, value in fields:
                 current_field += 1
                 
                 # 진행 상황 콜백 호출
@@ -1494,37 +1704,31 @@ class BrowserAutomation:
                     except:
                         pass
                 
-                tag = field_info.get("tag", "input")
-                field_type = field_info.get("type", "text")
-                value = field_info.get("value") or field_info.get("Value", "")
-                
                 logger.info(f"\n필드 처리: {field_name}")
                 logger.info(f"  Tag: {tag}, Type: {field_type}, Value: {value}")
                 
+                # 일괄 입력에서 처리된 필드는 건너뜀
+                if field_name not in missing:
+                    logger.info(f"  ✓ 일괄 입력 완료: {value}")
+                    continue
+                
+                # 2차: 일괄 입력에서 처리하지 못한 필드만 개별 처리
                 # name 속성으로 요소 찾기
-                element = await self.find_element_safe("name", field_name, timeout=10000)
+                element = await self.find_element_safe("name", field_name)
                 
                 if not element:
                     logger.warning(f"  ⚠️ 필드를 찾을 수 없습니다: {field_name}")
                     continue
                 
-                # 요소가 보이도록 스크롤
-                try:
-                    await element.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.1)  # 0.5초 → 0.1초
-                except:
-                    pass
-                
                 # tag와 type에 따라 처리
+                # (fill/check/click이 필요한 경우 스크롤까지 처리하므로 별도 스크롤 호출 없음)
                 if tag == "input":
                     if field_type == "text":
                         try:
-                            await element.clear()
-                            await asyncio.sleep(0.05)  # 0.2초 → 0.05초
+                            # fill()이 스크롤/포커스/기존 값 제거/입력을 한 번에 처리
                             await element.fill(value)
-                            await asyncio.sleep(0.1)  # 0.3초 → 0.1초
                             
-                            # 입력 확인
+                            # 입력 확인 (fill()은 값 반영 후 반환되므로 바로 확인)
                             final_value = await element.input_value()
                             if final_value == value or (final_value and value in final_value):
                                 logger.info(f"  ✓ 텍스트 입력 완료: {value}")
@@ -1537,39 +1741,39 @@ class BrowserAutomation:
                         try:
                             value_lower = value.lower().strip()
                             
-                            # 모든 라디오 버튼 가져오기
+                            # 모든 라디오 버튼의 id / value / label 텍스트 / 선택 여부를 한 번에 가져오기
                             radios_locator = self.page.locator(f"input[name='{field_name}'][type='radio']")
-                            radios_count = await radios_locator.count()
+                            radios = await radios_locator.evaluate_all("""
+                                (radios) => radios.map(r => {
+                                    const id = r.getAttribute('id') || '';
+                                    const label = id ? document.querySelector(`label[for="${CSS.escape(id)}"]`) : null;
+                                    return [id, r.getAttribute('value') || '', label ? (label.textContent || '').trim() : '', r.checked];
+                                })
+                            """)
+                            radios_count = len(radios)
                             logger.info(f"  📻 라디오 버튼 개수: {radios_count}")
                             
                             # 여러 방법으로 매칭 시도
                             radio_found = None
-                            for i in range(radios_count):
-                                r = radios_locator.nth(i)
-                                r_id = ((await r.get_attribute("id")) or "").lower().strip()
-                                r_value = ((await r.get_attribute("value")) or "").strip()
+                            radio_checked = False
+                            for i, (r_id, r_value, label_text, r_checked) in enumerate(radios):
+                                r_value = r_value.strip()
                                 
-                                if value_lower == r_id or value == r_value or value_lower == r_value.lower():
-                                    radio_found = r
+                                if value_lower == r_id.lower().strip() or value == r_value or value_lower == r_value.lower():
+                                    radio_found = radios_locator.nth(i)
+                                    radio_checked = r_checked
                                     break
                                 
                                 # label 텍스트로 찾기
-                                try:
-                                    r_id_for_label = await r.get_attribute("id")
-                                    if r_id_for_label:
-                                        label = self.page.locator(f"label[for='{r_id_for_label}']")
-                                        if await label.count() > 0:
-                                            label_text = ((await label.text_content()) or "").strip()
-                                            if value == label_text or value_lower == label_text.lower():
-                                                radio_found = r
-                                                break
-                                except:
-                                    pass
+                                if r_id and (value == label_text or value_lower == label_text.lower()):
+                                    radio_found = radios_locator.nth(i)
+                                    radio_checked = r_checked
+                                    break
                             
                             if radio_found:
-                                if not await radio_found.is_checked():
+                                # 선택 여부는 위에서 함께 가져왔으므로 별도 is_checked() 호출 없음
+                                if not radio_checked:
                                     await radio_found.check()
-                                    await asyncio.sleep(0.1)  # 0.5초 → 0.1초
                                     logger.info(f"  ✓ 라디오 버튼 선택 완료: {value}")
                                 else:
                                     logger.info(f"  ✓ 라디오 버튼 이미 선택됨: {value}")
@@ -1578,27 +1782,26 @@ class BrowserAutomation:
                         except Exception as e:
                             logger.warning(f"  ⚠️ 라디오 버튼 선택 실패: {str(e)}")
                     else:
-                        await element.clear()
                         await element.fill(value)
                         logger.info(f"  ✓ 입력 완료: {value}")
                 
                 elif tag == "select" or tag == "selection":
                     try:
-                        # 셀렉트 박스 처리
-                        options_locator = element.locator("option")
-                        options_count = await options_locator.count()
+                        # 셀렉트 박스 처리 (옵션은 한 번에 가져옴)
+                        options = await self._get_select_options(element)
+                        options_count = len(options)
                         logger.info(f"  📋 셀렉트 박스 옵션 개수: {options_count}")
                         
                         # 옵션 검색 (정확한 매칭 우선)
                         target_value = None
                         matched_option_index = None
                         
+                        # 루프 밖에서 한 번만 소문자 변환
+                        value_lower = value.lower()
+                        value_words = value_lower.split()
+                        
                         # 1단계: 정확한 매칭 (대소문자 구분)
-                        for i in range(options_count):
-                            opt = options_locator.nth(i)
-                            option_text = ((await opt.text_content()) or "").strip()
-                            option_value = ((await opt.get_attribute("value")) or "").strip()
-                            
+                        for i, (option_value, option_text) in enumerate(options):
                             if value == option_value or value == option_text:
                                 target_value = option_value if option_value else option_text
                                 matched_option_index = i
@@ -1607,12 +1810,8 @@ class BrowserAutomation:
                         
                         # 2단계: 정확한 매칭 (대소문자 무시)
                         if not target_value:
-                            for i in range(options_count):
-                                opt = options_locator.nth(i)
-                                option_text = ((await opt.text_content()) or "").strip()
-                                option_value = ((await opt.get_attribute("value")) or "").strip()
-                                
-                                if value.lower() == option_value.lower() or value.lower() == option_text.lower():
+                            for i, (option_value, option_text) in enumerate(options):
+                                if value_lower == option_value.lower() or value_lower == option_text.lower():
                                     target_value = option_value if option_value else option_text
                                     matched_option_index = i
                                     logger.info(f"  대소문자 무시 정확한 매칭 발견 (인덱스 {i}): value={option_value}, text={option_text}")
@@ -1625,18 +1824,15 @@ class BrowserAutomation:
                             
                             if not is_numeric:
                                 # 숫자가 아닌 경우에만 부분 일치 시도
-                                for i in range(options_count):
-                                    opt = options_locator.nth(i)
-                                    option_text = ((await opt.text_content()) or "").strip()
-                                    option_value = ((await opt.get_attribute("value")) or "").strip()
-                                    
+                                for i, (option_value, option_text) in enumerate(options):
                                     # 단어 경계를 고려한 부분 일치 (공백이나 구분자로 분리된 단어)
-                                    if value.lower() in option_text.lower() or value.lower() in option_value.lower():
+                                    ot_lower = option_text.lower()
+                                    ov_lower = option_value.lower()
+                                    if value_lower in ot_lower or value_lower in ov_lower:
                                         # 단어 단위로 확인 (부분 문자열이 아닌 단어로)
-                                        option_words = option_text.lower().split()
-                                        value_words = value.lower().split()
+                                        option_words = ot_lower.split()
                                         
-                                        if any(vw in option_words for vw in value_words) or value.lower() == option_text.lower() or value.lower() == option_value.lower():
+                                        if any(vw in option_words for vw in value_words) or value_lower == ot_lower or value_lower == ov_lower:
                                             target_value = option_value if option_value else option_text
                                             matched_option_index = i
                                             logger.info(f"  부분 일치 발견 (인덱스 {i}): value={option_value}, text={option_text}")
@@ -1652,7 +1848,6 @@ class BrowserAutomation:
                                 else:
                                     # 값으로 선택
                                     await element.select_option(target_value)
-                                await asyncio.sleep(0.2)
                                 
                                 # 선택 확인
                                 selected_value = await element.input_value()
@@ -1661,10 +1856,9 @@ class BrowserAutomation:
                                 logger.warning(f"  select_option 실패, 대체 방법 시도: {str(select_error)}")
                                 # 대체 방법: 직접 클릭
                                 try:
-                                    opt = options_locator.nth(matched_option_index) if matched_option_index is not None else None
+                                    opt = element.locator("option").nth(matched_option_index) if matched_option_index is not None else None
                                     if opt:
                                         await opt.click()
-                                        await asyncio.sleep(0.2)
                                         logger.info(f"  ✓ 셀렉트 박스 선택 완료 (클릭 방식): {target_value}")
                                 except:
                                     logger.warning(f"  대체 방법도 실패")
@@ -1672,15 +1866,10 @@ class BrowserAutomation:
                             logger.warning(f"  ⚠️ 셀렉트 박스에서 값을 찾을 수 없습니다: {value}")
                             # 디버깅: 모든 옵션 출력
                             logger.info(f"  사용 가능한 옵션:")
-                            for i in range(min(options_count, 10)):  # 최대 10개만 출력
-                                opt = options_locator.nth(i)
-                                option_text = ((await opt.text_content()) or "").strip()
-                                option_value = ((await opt.get_attribute("value")) or "").strip()
+                            for i, (option_value, option_text) in enumerate(options[:10]):  # 최대 10개만 출력
                                 logger.info(f"    [{i}] value='{option_value}', text='{option_text}'")
                     except Exception as e:
                         logger.warning(f"  ⚠️ 셀렉트 박스 선택 실패: {str(e)}")
-                
-                await asyncio.sleep(0.1)  # 각 필드 입력 사이 대기 (0.5초 → 0.1초)
             
             logger.info("\n=== 폼 필드 입력 완료 ===\n")
             
@@ -1699,28 +1888,34 @@ class BrowserAutomation:
         try:
             if button_selectors is None:
                 button_selectors = [
-                    ("xpath", "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'save')]"),
-                    ("xpath", "//button[contains(text(), 'Save') or contains(text(), '저장')]"),
+                    ("css", _SAVE_BUTTON_SELECTOR),
                     ("css", "button[type='submit']"),
                     ("name", "save"),
                     ("id", "save"),
                     ("css", "button.btn-primary"),
                 ]
             
-            save_btn = await self.find_element_multiple_ways(button_selectors, wait_for_clickable=True, timeout=10000)
+            # 같은 페이지에서 이미 찾은 버튼이 있으면 재사용 (URL이 바뀌면 자동으로 무효화)
+            cache_key = (self.page.url, tuple(button_selectors))
+            save_btn = self._save_button_cache.get(cache_key)
+            if save_btn is not None and await save_btn.count() == 0:
+                save_btn = None
+            
+            if not save_btn:
+                save_btn = await self.find_element_multiple_ways(button_selectors, wait_for_clickable=True, timeout=10000)
             
             if not save_btn:
                 logger.warning("Save 버튼을 찾을 수 없습니다. 모든 버튼 검색 중...")
                 try:
+                    # 모든 submit 버튼의 텍스트를 한 번에 가져옴
                     all_submit_buttons_locator = self.page.locator("button[type='submit']")
-                    buttons_count = await all_submit_buttons_locator.count()
-                    logger.info(f"  발견된 submit 버튼 개수: {buttons_count}")
-                    for i in range(buttons_count):
-                        btn = all_submit_buttons_locator.nth(i)
-                        btn_text = ((await btn.text_content()) or "").strip()
+                    button_texts = await all_submit_buttons_locator.all_text_contents()
+                    logger.info(f"  발견된 submit 버튼 개수: {len(button_texts)}")
+                    for i, btn_text in enumerate(button_texts):
+                        btn_text = btn_text.strip()
                         logger.info(f"    버튼 {i+1}: text='{btn_text}'")
                         if "save" in btn_text.lower():
-                            save_btn = btn
+                            save_btn = all_submit_buttons_locator.nth(i)
                             logger.info(f"  ✓ 'Save' 텍스트를 포함한 버튼 발견: '{btn_text}'")
                             break
                 except Exception as e:
@@ -1731,9 +1926,12 @@ class BrowserAutomation:
                 await self.save_debug_info("save_button_not_found")
                 return False
             
-            # 버튼 정보 로깅
-            btn_text = ((await save_btn.text_content()) or "").strip()
-            btn_type = (await save_btn.get_attribute("type")) or ""
+            self._save_button_cache[cache_key] = save_btn
+            
+            # 버튼 정보 로깅 (텍스트와 type을 한 번에 가져옴)
+            btn_text, btn_type = await save_btn.evaluate(
+                "(btn) => [(btn.textContent || '').trim(), btn.getAttribute('type') || '']"
+            )
             logger.info(f"  찾은 Save 버튼: text='{btn_text}', type='{btn_type}'")
             
             # 현재 URL 저장
@@ -1742,86 +1940,69 @@ class BrowserAutomation:
             
             # 스크롤하여 버튼이 보이도록
             await save_btn.scroll_into_view_if_needed()
-            await asyncio.sleep(0.2)
             
             # 클릭
             await save_btn.click()
             logger.info("  Save 버튼 클릭 완료")
             
-            # 저장 후 대기 및 확인 (다음 화면이 나올 때까지 충분히 대기)
+            # 저장 후 다음 화면 대기 (URL이 바뀌는 즉시 진행)
             logger.info("  저장 후 대기 중...")
-            await asyncio.sleep(1.0)  # 저장 버튼 클릭 후 초기 대기
-            
-            # 페이지 전환 또는 로드 완료까지 대기
-            max_wait_time = 15  # 최대 15초 대기
-            waited = 0
             page_changed = False
-            
-            while waited < max_wait_time:
-                try:
-                    # URL 변경 확인
-                    new_url = self.page.url
-                    if new_url != current_url:
-                        logger.info(f"  ✓ 페이지 전환 확인: {new_url}")
-                        page_changed = True
-                        break
-                    
-                    # 페이지 로드 상태 확인
-                    try:
-                        await self.page.wait_for_load_state("load", timeout=2000)
-                        # load 상태가 완료되었으면 추가로 networkidle 확인 시도
-                        try:
-                            await self.page.wait_for_load_state("networkidle", timeout=3000)
-                            logger.info("  ✓ 페이지 로드 완료 (networkidle)")
-                            break
-                        except:
-                            # networkidle 실패해도 load는 완료되었으므로 계속 진행
-                            logger.debug("  networkidle 대기 시간 초과 (계속 진행)")
-                            break
-                    except:
-                        pass
-                    
-                    await asyncio.sleep(0.5)
-                    waited += 0.5
-                except Exception as e:
-                    logger.debug(f"  대기 중 오류: {str(e)}")
-                    break
+            try:
+                await self.page.wait_for_url(lambda u: u != current_url, wait_until="domcontentloaded", timeout=3000)
+                logger.info(f"  ✓ 페이지 전환 확인: {self.page.url}")
+                page_changed = True
+            except:
+                pass
             
             if not page_changed:
-                # URL이 변경되지 않았어도 페이지가 로드되었는지 확인
+                # URL이 변경되지 않았으면 같은 페이지에서 저장 요청이 끝날 때까지 대기
                 try:
-                    await self.page.wait_for_load_state("domcontentloaded", timeout=5000)
-                    logger.info("  페이지 로드 완료 (URL 변경 없음)")
+                    await self.page.wait_for_load_state("networkidle", timeout=3000)
+                    logger.info("  ✓ 페이지 로드 완료 (URL 변경 없음)")
                 except:
                     logger.warning("  페이지 로드 대기 시간 초과 (계속 진행)")
             
-            # 최종 안정화 대기
-            await asyncio.sleep(0.5)
-            
             logger.info("  저장 프로세스 완료")
             return True
             
         except Exception as e:
             logger.error(f"Save 버튼 클릭 중 오류: {str(e)}")
-            import traceback
-            logger.error(f"상세 오류: {traceback.format_exc()}")
+            # 상세 트레이스백은 DEBUG 레벨에서만 포맷
+            logger.debug("상세 오류", exc_info=True)
             return False
     
-    async def fill_form_sequential(self, form_items: List[Dict[str, Any]], progress_callback: Optional[Callable] = None):
+    async def fill_form_sequential(self, form_items: Union[List[Dict[str, Any]], Tuple[Tuple[Any, ...], ...]], progress_callback: Optional[Callable] = None):
         """
         JSON 배열을 순서대로 처리하여 폼을 채우는 함수
         
         Args:
-            form_items: 딕셔너리 리스트 형태의 폼 데이터
+            form_items: 딕셔너리 리스트 형태의 폼 데이터 (또는 _normalize_form_items로 미리 정규화한 튜플)
             progress_callback: 진행 상황을 전달할 콜백 함수 (current, total, item) => None
         """
         try:
             logger.info("\n=== 순차적 폼 필드 입력 시작 ===")
             
-            total_items = len(form_items)
+            # 미리 정규화된 튜플(NORMALIZED_PROFILE_FORM_DATA 등)이면 그대로 사용
+            normalized_items = form_items if isinstance(form_items, tuple) else _normalize_form_items(form_items)
+            total_items = len(normalized_items)
             current_item = 0
             
-            for item in form_items:
+            # 제출/링크 사이의 연속된 입력 항목(select, text input)은 한 번의 JavaScript 호출로 일괄 입력
+            # {묶음 시작 위치: [[name, tag, type, value], ...]}
+            batch_runs: Dict[int, List[List[str]]] = {}
+            run_start = None
+            for index, (_, tag, field_name, field_type, value, _) in enumerate(normalized_items):
+                if _is_batch_fillable(tag, field_name, field_type):
+                    if run_start is None:
+                        run_start = index
+                        batch_runs[run_start] = []
+                    batch_runs[run_start].append([field_name, tag, field_type, value])
+                else:
+                    run_start = None
+            batch_filled: set = set()
+            
+            for index, (item, tag, field_name, field_type, value, selector) in enumerate(normalized_items):
                 current_item += 1
                 
                 # 진행 상황 콜백 호출
@@ -1835,11 +2016,6 @@ class BrowserAutomation:
                     except:
                         pass
                 
-                tag = item.get("tag", "input")
-                field_name = item.get("name", "")
-                field_type = item.get("type", "text")
-                value = item.get("value", "")
-                
                 logger.info(f"\n[항목 {current_item}/{total_items}] 처리 중...")
                 logger.info(f"  Tag: {tag}, Name: {field_name}, Type: {field_type}, Value: {value}")
                 
@@ -1850,10 +2026,26 @@ class BrowserAutomation:
                     except:
                         pass
                     await asyncio.sleep(0.2)  # 첫 번째 항목은 화면 안정화 대기
-                else:
-                    # 이후 항목들은 최소 대기만
+                elif index in batch_runs or field_name not in batch_filled:
+                    # 이후 항목들은 최소 대기만 (일괄 입력된 항목은 대기 없음)
                     await asyncio.sleep(0.05)  # 최소 대기 시간
                 
+                # 묶음의 첫 항목에서 묶음 전체를 일괄 입력 (제출 후 새 페이지가 로드된 뒤 실행됨)
+                if index in batch_runs:
+                    fields = batch_runs[index]
+                    try:
+                        missing = set(await self.page.evaluate(_FORM_FILL_JS, fields))
+                        batch_filled = {field[0] for field in fields} - missing
+                        logger.info(f"  일괄 입력 완료: {len(batch_filled)}/{len(fields)}개 (개별 처리 필요: {len(missing)}개)")
+                    except Exception as e:
+                        logger.warning(f"  ⚠️ 일괄 입력 실패, 개별 입력으로 진행: {str(e)}")
+                        batch_filled = set()
+                
+                # 일괄 입력에서 처리된 항목은 건너뜀 (정확히 일치하는 옵션이 없는 등 처리하지 못한 항목만 개별 처리)
+                if field_name in batch_filled and _is_batch_fillable(tag, field_name, field_type):
+                    logger.info(f"  ✓ 일괄 입력 완료: {value}")
+                    continue
+                
                 # 태그 타입에 따라 처리
                 if tag == "select":
                     # 셀렉트 박스 처리
@@ -1861,7 +2053,7 @@ class BrowserAutomation:
                         logger.warning("  ⚠️ name이 없어 셀렉트 박스를 찾을 수 없습니다.")
                         continue
                     
-                    element = await self.find_element_safe("name", field_name, timeout=10000)
+                    element = await self.find_element_safe("css", selector)
                     if not element:
                         logger.warning(f"  ⚠️ 셀렉트 박스를 찾을 수 없습니다: {field_name}")
                         continue
@@ -1870,18 +2062,17 @@ class BrowserAutomation:
                         await element.scroll_into_view_if_needed()
                         await asyncio.sleep(0.05)  # 최소 대기 시간
                         
-                        # 옵션 검색 (정확한 매칭 우선)
-                        options_locator = element.locator("option")
-                        options_count = await options_locator.count()
+                        # 옵션 검색 (정확한 매칭 우선, 옵션은 한 번에 가져옴)
+                        options = await self._get_select_options(element)
                         target_value = None
                         matched_option_index = None
                         
+                        # 루프 밖에서 한 번만 소문자 변환
+                        value_lower = value.lower()
+                        value_words = value_lower.split()
+                        
                         # 1단계: 정확한 매칭 (대소문자 구분)
-                        for i in range(options_count):
-                            opt = options_locator.nth(i)
-                            option_text = ((await opt.text_content()) or "").strip()
-                            option_value = ((await opt.get_attribute("value")) or "").strip()
-                            
+                        for i, (option_value, option_text) in enumerate(options):
                             if value == option_value or value == option_text:
                                 target_value = option_value if option_value else option_text
                                 matched_option_index = i
@@ -1890,12 +2081,8 @@ class BrowserAutomation:
                         
                         # 2단계: 정확한 매칭 (대소문자 무시)
                         if not target_value:
-                            for i in range(options_count):
-                                opt = options_locator.nth(i)
-                                option_text = ((await opt.text_content()) or "").strip()
-                                option_value = ((await opt.get_attribute("value")) or "").strip()
-                                
-                                if value.lower() == option_value.lower() or value.lower() == option_text.lower():
+                            for i, (option_value, option_text) in enumerate(options):
+                                if value_lower == option_value.lower() or value_lower == option_text.lower():
                                     target_value = option_value if option_value else option_text
                                     matched_option_index = i
                                     logger.info(f"  대소문자 무시 정확한 매칭 발견 (인덱스 {i}): value={option_value}, text={option_text}")
@@ -1908,18 +2095,15 @@ class BrowserAutomation:
                             
                             if not is_numeric:
                                 # 숫자가 아닌 경우에만 부분 일치 시도
-                                for i in range(options_count):
-                                    opt = options_locator.nth(i)
-                                    option_text = ((await opt.text_content()) or "").strip()
-                                    option_value = ((await opt.get_attribute("value")) or "").strip()
-                                    
+                                for i, (option_value, option_text) in enumerate(options):
                                     # 단어 경계를 고려한 부분 일치
-                                    if value.lower() in option_text.lower() or value.lower() in option_value.lower():
+                                    ot_lower = option_text.lower()
+                                    ov_lower = option_value.lower()
+                                    if value_lower in ot_lower or value_lower in ov_lower:
                                         # 단어 단위로 확인
-                                        option_words = option_text.lower().split()
-                                        value_words = value.lower().split()
+                                        option_words = ot_lower.split()
                                         
-                                        if any(vw in option_words for vw in value_words) or value.lower() == option_text.lower() or value.lower() == option_value.lower():
+                                        if any(vw in option_words for vw in value_words) or value_lower == ot_lower or value_lower == ov_lower:
                                             target_value = option_value if option_value else option_text
                                             matched_option_index = i
                                             logger.info(f"  부분 일치 발견 (인덱스 {i}): value={option_value}, text={option_text}")
@@ -1940,7 +2124,7 @@ class BrowserAutomation:
                             except Exception as select_error:
                                 logger.warning(f"  select_option 실패, 대체 방법 시도: {str(select_error)}")
                                 try:
-                                    opt = options_locator.nth(matched_option_index) if matched_option_index is not None else None
+                                    opt = element.locator("option").nth(matched_option_index) if matched_option_index is not None else None
                                     if opt:
                                         await opt.click()
                                         await asyncio.sleep(0.05)  # 최소 대기 시간
@@ -1951,10 +2135,7 @@ class BrowserAutomation:
                             logger.warning(f"  ⚠️ 옵션을 찾을 수 없습니다: {value}")
                             # 디버깅: 모든 옵션 출력
                             logger.info(f"  사용 가능한 옵션:")
-                            for i in range(min(options_count, 10)):  # 최대 10개만 출력
-                                opt = options_locator.nth(i)
-                                option_text = ((await opt.text_content()) or "").strip()
-                                option_value = ((await opt.get_attribute("value")) or "").strip()
+                            for i, (option_value, option_text) in enumerate(options[:10]):  # 최대 10개만 출력
                                 logger.info(f"    [{i}] value='{option_value}', text='{option_text}'")
                     except Exception as e:
                         logger.warning(f"  ⚠️ 셀렉트 박스 선택 실패: {str(e)}")
@@ -1970,7 +2151,7 @@ class BrowserAutomation:
                                 logger.warning("  ⚠️ 제출 버튼을 찾을 수 없습니다.")
                                 continue
                         else:
-                            submit_btn = await self.find_element_safe("name", field_name, timeout=10000)
+                            submit_btn = await self.find_element_safe("css", selector)
                             if not submit_btn:
                                 logger.warning(f"  ⚠️ 제출 버튼을 찾을 수 없습니다: {field_name}")
                                 continue
@@ -1993,16 +2174,13 @@ class BrowserAutomation:
                             logger.warning("  ⚠️ name이 없어 입력 필드를 찾을 수 없습니다.")
                             continue
                         
-                        element = await self.find_element_safe("name", field_name, timeout=10000)
+                        element = await self.find_element_safe("css", selector)
                         if not element:
                             logger.warning(f"  ⚠️ 입력 필드를 찾을 수 없습니다: {field_name}")
                             continue
                         
                         try:
-                            await element.scroll_into_view_if_needed()
-                            await asyncio.sleep(0.05)  # 최소 대기 시간
-                            await element.clear()
-                            await asyncio.sleep(0.02)  # 최소 대기 시간
+                            # fill()이 스크롤/포커스/기존 값 제거/입력을 한 번에 처리
                             await element.fill(value)
                             logger.info(f"  ✓ 텍스트 입력 완료: {value}")
                         except Exception as e:
@@ -2048,8 +2226,178 @@ class BrowserAutomation:
                 await self.context.close()
             if self.browser:
                 await self.browser.close()
-            if self.playwright:
-                await self.playwright.stop()
+            # Playwright 드라이버는 공유하므로 여기서 종료하지 않음 (shutdown_playwright 참고)
             logger.info("브라우저가 종료되었습니다.")
         except Exception as e:
             logger.error(f"브라우저 종료 중 오류: {str(e)}")
+
+
+class BrowserPool:
+    """
+    미리 실행해 둔 브라우저 프로세스를 재사용하는 풀
+    
+    브라우저 실행 비용(수 초)을 요청마다 지불하지 않도록 브라우저 프로세스는 재사용하되,
+    꺼낼 때마다 새 컨텍스트를 가진 세션 인스턴스(new_session)를 돌려주고 반환 시 그 컨텍스트를 닫습니다.
+    일정 횟수 이상 사용했거나 오래된 브라우저는 꺼낼 때 새 브라우저로 교체합니다.
+    """
+    
+    def __init__(self, size: int = 2, max_uses: int = 20, max_age: float = 1800.0):
+        """
+        Args:
+            size: 풀에 유지할 최대 브라우저 수
+            max_uses: 브라우저 하나를 재사용할 최대 횟수
+            max_age: 브라우저 하나를 재사용할 최대 시간 (초)
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        # 대기 중인 브라우저 (컨텍스트 없이 브라우저 프로세스만 가진 인스턴스)
+        self._idle: List[BrowserAutomation] = []
+        # 사용 중인 세션 -> 그 세션을 만든 브라우저
+        self._in_use: Dict[BrowserAutomation, BrowserAutomation] = {}
+        self._created = 0
+        # 반환/폐기 시 대기 중인 acquire()를 깨우는 조건 변수 (이벤트 루프 안에서 생성)
+        self._cond: Optional[asyncio.Condition] = None
+        # 브라우저별 (사용 횟수, 시작 시각)
+        self._stats: Dict[int, Tuple[int, float]] = {}
+    
+    def _ensure_cond(self) -> asyncio.Condition:
+        """이벤트 루프 안에서 조건 변수 생성 (모듈 로드 시점에는 루프가 없을 수 있음)"""
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+    
+    async def _launch(self) -> BrowserAutomation:
+        """새 브라우저 실행 (슬롯은 호출하는 쪽에서 미리 확보하고, 실패 시 반납도 호출하는 쪽에서 처리)"""
+        browser = await BrowserAutomation.create(with_context=False)
+        self._stats[id(browser)] = (0, time.monotonic())
+        return browser
+    
+    async def _release_slot(self):
+        """브라우저 슬롯 하나를 반납하고 대기 중인 acquire()를 깨움"""
+        # 슬롯 수는 락을 기다리기 전에 바로 복구 (알림 도중 취소되어도 슬롯이 새지 않도록)
+        self._created -= 1
+        cond = self._ensure_cond()
+        async with cond:
+            cond.notify_all()
+    
+    async def _discard(self, browser: BrowserAutomation):
+        """브라우저 종료 및 풀에서 제거 (대기 중인 acquire()가 새 브라우저를 실행할 수 있도록 알림)"""
+        self._stats.pop(id(browser), None)
+        await self._release_slot()
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.warning(f"브라우저 종료 실패: {str(e)}")
+    
+    def _is_expired(self, browser: BrowserAutomation) -> bool:
+        """재사용 한도(횟수/시간)를 넘었는지 확인"""
+        uses, started = self._stats.get(id(browser), (0, time.monotonic()))
+        return uses >= self.max_uses or time.monotonic() - started >= self.max_age
+    
+    async def acquire(self, timeout: Optional[float] = None) -> BrowserAutomation:
+        """
+        풀의 브라우저에서 새 세션을 만들어 반환 (없으면 새로 실행, 한도에 도달했으면 반환/폐기될 때까지 대기)
+        
+        반환값은 체크아웃마다 새로 만든 세션 인스턴스이며, release()하면 컨텍스트가 닫힙니다.
+        
+        Args:
+            timeout: 브라우저가 반환되기를 기다릴 최대 시간 (초, None이면 settings.browser_acquire_timeout)
+        
+        Raises:
+            asyncio.TimeoutError: timeout 안에 사용할 수 있는 브라우저가 없는 경우
+        """
+        if timeout is None:
+            timeout = settings.browser_acquire_timeout
+        cond = self._ensure_cond()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        
+        async with cond:
+            while not self._idle and self._created >= self.size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"브라우저 풀 대기 시간({timeout}초)을 초과했습니다.")
+                try:
+                    await asyncio.wait_for(cond.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            if self._idle:
+                browser = self._idle.pop()
+            else:
+                browser = None
+                self._created += 1
+        
+        # 여기서부터는 슬롯을 확보한 상태: 취소(CancelledError)를 포함한 모든 실패에서 슬롯을 반납
+        try:
+            if browser is None:
+                browser = await self._launch()
+            elif self._is_expired(browser):
+                # 한도를 넘은 브라우저는 같은 슬롯에서 새 브라우저로 교체
+                logger.info("재사용 한도에 도달한 브라우저를 교체합니다.")
+                expired, browser = browser, None
+                self._stats.pop(id(expired), None)
+                try:
+                    await expired.close()
+                except Exception as e:
+                    logger.warning(f"브라우저 종료 실패: {str(e)}")
+                browser = await self._launch()
+            
+            session = await browser.new_session()
+        except BaseException:
+            if browser is not None:
+                await self._discard(browser)
+            else:
+                await self._release_slot()
+            raise
+        
+        uses, started = self._stats[id(browser)]
+        self._stats[id(browser)] = (uses + 1, started)
+        self._in_use[session] = browser
+        return session
+    
+    async def release(self, session: BrowserAutomation):
+        """세션을 닫고 브라우저를 풀에 반환 (컨텍스트를 닫아 쿠키/스토리지/캐시 제거)"""
+        browser = self._in_use.pop(session, None)
+        if browser is None:
+            logger.warning("풀에서 꺼내지 않았거나 이미 반환된 세션입니다.")
+            return
+        try:
+            await session.close_session()
+        except Exception as e:
+            logger.warning(f"세션 종료 실패, 브라우저를 종료합니다: {str(e)}")
+            await self._discard(browser)
+            return
+        except BaseException:
+            # 반환 도중 취소되어도 슬롯이 새지 않도록 브라우저를 정리
+            await self._discard(browser)
+            raise
+        if browser.browser is None or not browser.browser.is_connected():
+            logger.warning("브라우저 연결이 끊어져 브라우저를 종료합니다.")
+            await self._discard(browser)
+            return
+        cond = self._ensure_cond()
+        async with cond:
+            self._idle.append(browser)
+            cond.notify_all()
+    
+    @asynccontextmanager
+    async def session(self):
+        """async with browser_pool.session() as automation: 형태로 사용"""
+        automation = await self.acquire()
+        try:
+            yield automation
+        finally:
+            await self.release(automation)
+    
+    async def close(self):
+        """대기 중인 브라우저와 사용 중인 세션의 브라우저를 모두 종료 (애플리케이션 종료 시)"""
+        while self._idle:
+            await self._discard(self._idle.pop())
+        while self._in_use:
+            _, browser = self._in_use.popitem()
+            await self._discard(browser)
+
+
+# 애플리케이션 전체에서 공유하는 브라우저 풀 (라우터의 동시 실행 제한과 같은 크기)
+browser_pool = BrowserPool(size=settings.browser_pool_size)
@@ -1,29 +1,69 @@
 from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from typing import Any
+import threading
 import pikepdf
 from lxml import etree
 
 NS = {"xfa": "http://www.xfa.org/schema/xfa-data/1.0/"}
 
+# XFA 배열의 패킷 이름 (바이트로 비교)
+_DATASETS_PACKET = b"datasets"
+_TEMPLATE_PACKET = b"template"
+
+# set_node에서 field 값 노드를 만들 때 쓰는 XFA form 네임스페이스 태그 (호출마다 f-string을 만들지 않도록)
+NS_XFA_FORM = "http://www.xfa.org/schema/xfa-form/2.8/"
+_VALUE_QNAME = f"{{{NS_XFA_FORM}}}value"
+_TEXT_QNAME = f"{{{NS_XFA_FORM}}}text"
+
+# parse_xml용 스레드별 파서 보관
+_parser_local = threading.local()
+
 def _get_xfa(pdf: pikepdf.Pdf):
 	acro = pdf.Root.get("/AcroForm", None)
 	if acro is None or "/XFA" not in acro:
 		raise RuntimeError("XFA 엔트리를 찾지 못했습니다. (XFA 폼 아님 또는 평탄화됨)")
 	return acro["/XFA"]
 
+def _is_packet(name, packet: bytes) -> bool:
+	"""XFA 배열의 이름 항목이 packet인지 확인합니다. (str 변환 없이 바이트 비교, 대소문자 무시)"""
+	if not isinstance(name, pikepdf.String):
+		return False
+	raw = bytes(name)
+	return raw == packet or raw.lower() == packet
+
+@dataclass
+class XFAHandle:
+	"""열린 PDF의 XFA 엔트리와 datasets 패킷 위치 (datasets를 읽고 다시 쓸 때 배열을 다시 찾지 않도록 보관)"""
+	pdf: pikepdf.Pdf
+	xfa: Any
+	datasets_index: int | None  # XFA 배열 안의 datasets 스트림 위치 (단일 스트림이면 None)
+
+def get_xfa_handle(pdf: pikepdf.Pdf) -> XFAHandle:
+	"""이미 열린 PDF에서 XFA datasets 패킷 위치를 한 번만 찾아 핸들로 반환합니다."""
+	xfa = _get_xfa(pdf)
+	if isinstance(xfa, pikepdf.Array):
+		for i in range(0, len(xfa), 2):
+			if _is_packet(xfa[i], _DATASETS_PACKET):
+				return XFAHandle(pdf=pdf, xfa=xfa, datasets_index=i + 1)
+		raise RuntimeError("XFA 배열에서 'datasets' 패킷을 찾지 못했습니다.")
+	elif isinstance(xfa, pikepdf.Stream):
+		return XFAHandle(pdf=pdf, xfa=xfa, datasets_index=None)
+	else:
+		raise RuntimeError("알 수 없는 XFA 형식입니다.")
+
+def read_datasets(handle: XFAHandle) -> bytes:
+	"""핸들이 가리키는 datasets XML을 읽습니다."""
+	stream = handle.xfa if handle.datasets_index is None else handle.xfa[handle.datasets_index]
+	return stream.read_bytes()
+
 def read_datasets_from_pdf(pdf_path: str | Path) -> bytes:
 	"""PDF에서 XFA datasets XML을 추출합니다."""
 	with pikepdf.open(str(pdf_path)) as pdf:
-		xfa = _get_xfa(pdf)
-		if isinstance(xfa, pikepdf.Array):
-			for i in range(0, len(xfa), 2):
-				if isinstance(xfa[i], pikepdf.String) and str(xfa[i]).lower() == "datasets":
-					return bytes(xfa[i+1].read_bytes())
-			raise RuntimeError("XFA 배열에서 'datasets' 패킷을 찾지 못했습니다.")
-		elif isinstance(xfa, pikepdf.Stream):
-			return bytes(xfa.read_bytes())
-		else:
-			raise RuntimeError("알 수 없는 XFA 형식입니다.")
+		return read_datasets(get_xfa_handle(pdf))
 
 def read_template_from_pdf(pdf_path: str | Path) -> bytes | None:
 	"""PDF에서 XFA template XML을 추출합니다."""
@@ -31,8 +71,8 @@ def read_template_from_pdf(pdf_path: str | Path) -> bytes | None:
 		xfa = _get_xfa(pdf)
 		if isinstance(xfa, pikepdf.Array):
 			for i in range(0, len(xfa), 2):
-				if isinstance(xfa[i], pikepdf.String) and str(xfa[i]).lower() == "template":
-					return bytes(xfa[i+1].read_bytes())
+				if _is_packet(xfa[i], _TEMPLATE_PACKET):
+					return xfa[i+1].read_bytes()
 			return None
 		elif isinstance(xfa, pikepdf.Stream):
 			# 단일 스트림인 경우 template이 별도로 없을 수 있음
@@ -40,53 +80,89 @@ def read_template_from_pdf(pdf_path: str | Path) -> bytes | None:
 		else:
 			return None
 
+def write_datasets(handle: XFAHandle, datasets_xml: bytes):
+	"""핸들이 가리키는 datasets XML을 교체합니다. (저장은 호출하는 쪽에서 수행)"""
+	# 새 스트림 생성 후 교체
+	new_stream = pikepdf.Stream(handle.pdf, datasets_xml)
+	new_stream["/Subtype"] = pikepdf.Name("/XML")
+	acro = handle.pdf.Root["/AcroForm"]
+	
+	if handle.datasets_index is None:
+		# 단일 스트림: /AcroForm /XFA 자체를 새 스트림으로 대체
+		acro["/XFA"] = new_stream
+		handle.xfa = new_stream
+	else:
+		# 배열: ["config", stream, "template", stream, "datasets", stream, ...]
+		handle.xfa[handle.datasets_index] = new_stream
+	
+	# 뷰어가 외형 재생성하도록 힌트
+	acro["/NeedAppearances"] = True
+
 def write_datasets_to_pdf(pdf_in: str | Path, datasets_xml: bytes, pdf_out: str | Path):
 	"""PDF에 XFA datasets XML을 주입합니다."""
 	with pikepdf.open(str(pdf_in)) as pdf:
-		acro = pdf.Root.get("/AcroForm", None)
-		if acro is None or "/XFA" not in acro:
-			raise RuntimeError("XFA 엔트리를 찾지 못했습니다.")
-		xfa = acro["/XFA"]
+		write_datasets(get_xfa_handle(pdf), datasets_xml)
+		pdf.save(str(pdf_out), static_id=True, linearize=False)
+
+@lru_cache(maxsize=4096)
+def strip_ns(tag: str) -> str:
+	"""XML 태그에서 네임스페이스를 제거합니다.
 	
-		if isinstance(xfa, pikepdf.Array):
-			# 배열: ["config", stream, "template", stream, "datasets", stream, ...]
-			replaced = False
-			for i in range(0, len(xfa), 2):
-				name = xfa[i]
-				if isinstance(name, pikepdf.String) and str(name).lower() == "datasets":
-					# 새 스트림 생성 후 교체
-					new_stream = pikepdf.Stream(pdf, datasets_xml)
-					new_stream["/Subtype"] = pikepdf.Name("/XML")
-					xfa[i + 1] = new_stream
-					replaced = True
-					break
-			if not replaced:
-				raise RuntimeError("XFA 배열에서 'datasets' 패킷을 찾지 못했습니다.")
+	문서 안의 태그 종류는 많지 않으므로 결과를 캐시합니다. (모든 순회에서 요소마다 호출됨)
+	"""
+	i = tag.find("}")
+	return tag[i + 1:] if i >= 0 else tag
+
+def build_path_index(base: etree._Element) -> dict:
+	"""base 아래 모든 요소를 한 번만 순회하여 경로 인덱스를 만듭니다.
 	
-		elif isinstance(xfa, pikepdf.Stream):
-			# 단일 스트림: /AcroForm /XFA 자체를 새 스트림으로 대체
-			new_stream = pikepdf.Stream(pdf, datasets_xml)
-			new_stream["/Subtype"] = pikepdf.Name("/XML")
-			acro["/XFA"] = new_stream
-		else:
-			raise RuntimeError("알 수 없는 XFA 형식입니다.")
+	키는 base부터의 ((태그, 같은 태그 형제 중 0-based 인덱스), ...) 튜플입니다.
+	(예: (("Page1", 0), ("KeepPageSeparate", 1), ("FamilyMember", 0)))
 	
-		# 뷰어가 외형 재생성하도록 힌트
-		acro["/NeedAppearances"] = True
+	Args:
+		base: 시작 노드 (예: IMM_0800)
 	
-		pdf.save(str(pdf_out), static_id=True, linearize=False)
+	Returns:
+		{경로 키: 요소} 딕셔너리
+	"""
+	index = {}
+	stack = [(base, ())]
+	while stack:
+		node, key = stack.pop()
+		counts = {}
+		for child in node:
+			if not isinstance(child.tag, str):
+				continue
+			tag = strip_ns(child.tag)
+			idx = counts.get(tag, 0)
+			counts[tag] = idx + 1
+			child_key = key + ((tag, idx),)
+			index[child_key] = child
+			stack.append((child, child_key))
+	return index
 
-def strip_ns(tag: str) -> str:
-	"""XML 태그에서 네임스페이스를 제거합니다."""
-	return tag.split("}", 1)[1] if "}" in tag else tag
+def _get_parser() -> etree.XMLParser:
+	"""스레드별로 한 번만 만든 XML 파서를 반환합니다.
+	
+	(lxml 파서는 같은 인스턴스로 동시에 파싱하면 서로 대기하므로 스레드마다 따로 둠)
+	- remove_blank_text=False: 공백 텍스트 정리 생략 (값 비교는 모두 strip() 후 수행)
+	- collect_ids=False: XFA는 xml:id 조회를 쓰지 않으므로 ID 해시 테이블 생략
+	- resolve_entities=False: 외부/내부 엔티티 확장 안 함
+	"""
+	parser = getattr(_parser_local, "parser", None)
+	if parser is None:
+		parser = etree.XMLParser(remove_blank_text=False, collect_ids=False, resolve_entities=False)
+		_parser_local.parser = parser
+	return parser
 
 def parse_xml(xml_bytes: bytes) -> etree._Element:
 	"""XML 바이트를 파싱하여 ElementTree Element를 반환합니다."""
-	parser = etree.XMLParser(remove_blank_text=True)
-	return etree.fromstring(xml_bytes, parser=parser)
+	return etree.fromstring(xml_bytes, parser=_get_parser())
 
 def serialize_xml(root: etree._Element) -> bytes:
 	"""ElementTree Element를 XML 바이트로 직렬화합니다."""
+	# BytesIO + ElementTree.write 방식은 출력은 같지만 측정 결과 더 느림 (스트림 래퍼 오버헤드)
+	# → libxml2 출력 버퍼에서 바로 bytes를 만드는 tostring 유지
 	return etree.tostring(root, encoding="utf-8", xml_declaration=False, pretty_print=False)
 
 def set_node(form: etree._Element, xpath: str, val: str):
@@ -123,7 +199,8 @@ def set_node(form: etree._Element, xpath: str, val: str):
 						idx_str = part.split("[")[1].split("]")[0]
 						try:
 							idx = int(idx_str) - 1  # 1-based -> 0-based
-							children = [c for c in cur if strip_ns(c.tag) == tag_name]
+							# 필요한 인덱스까지만 가져옴 (lxml이 C 레벨에서 태그 필터링)
+							children = list(islice(cur.iterchildren(f"{{*}}{tag_name}"), idx + 1))
 							if idx < len(children):
 								cur = children[idx]
 							else:
@@ -134,7 +211,8 @@ def set_node(form: etree._Element, xpath: str, val: str):
 							break
 					else:
 						# 태그 이름으로 직접 자식 찾기
-						children = [c for c in cur if hasattr(c, 'tag') and isinstance(c.tag, str) and strip_ns(c.tag) == part]
+						child = next(cur.iterchildren(f"{{*}}{part}"), None)
+						children = [child] if child is not None else []
 						if not children:
 							# 태그 이름으로 찾지 못하면 name 속성으로 찾기 (subform, exclGroup 등)
 							children = [c for c in cur if c.get("name") == part]
@@ -147,7 +225,7 @@ def set_node(form: etree._Element, xpath: str, val: str):
 								if strip_ns(cur.tag) == "exclGroup":
 									excl_groups = [cur]
 								else:
-									excl_groups = [c for c in cur if strip_ns(c.tag) == "exclGroup"]
+									excl_groups = list(cur.iterchildren("{*}exclGroup"))
 									# name 속성으로도 찾기
 									if not excl_groups:
 										parent_name = part.split("/")[0] if "/" in part else part
@@ -184,28 +262,20 @@ def set_node(form: etree._Element, xpath: str, val: str):
 				if found:
 					# field의 경우 value/text 요소에 값을 설정해야 함
 					if strip_ns(cur.tag) == "field":
-						# value 요소 찾기
-						value_parent = cur.find(".//{*}value")
+						# value 요소 찾기 (XFA에서 value는 field의 직접 자식이므로 하위 트리 전체를 검색하지 않음)
+						value_parent = cur.find("{*}value")
 						if value_parent is None:
-							# value 요소가 없으면 생성
-							from lxml.etree import Element
-							NS_XFA_FORM = "http://www.xfa.org/schema/xfa-form/2.8/"
-							value_parent = Element(f"{{{NS_XFA_FORM}}}value")
-							# override 속성 설정 (PDF 뷰어가 값을 인식하도록)
-							value_parent.set("override", "1")
-							cur.append(value_parent)
+							# value 요소가 없으면 생성 (override 속성: PDF 뷰어가 값을 인식하도록)
+							value_parent = etree.SubElement(cur, _VALUE_QNAME, attrib={"override": "1"})
 						else:
 							# value 요소가 있으면 override 속성도 설정
 							value_parent.set("override", "1")
 						
-						# text 요소 찾기
-						value_text = value_parent.find(".//{*}text")
+						# text 요소 찾기 (value의 직접 자식)
+						value_text = value_parent.find("{*}text")
 						if value_text is None:
 							# text 요소가 없으면 생성
-							from lxml.etree import Element
-							NS_XFA_FORM = "http://www.xfa.org/schema/xfa-form/2.8/"
-							value_text = Element(f"{{{NS_XFA_FORM}}}text")
-							value_parent.append(value_text)
+							value_text = etree.SubElement(value_parent, _TEXT_QNAME)
 						
 						value_text.text = "" if val is None else str(val)
 						return
@@ -220,28 +290,20 @@ def set_node(form: etree._Element, xpath: str, val: str):
 					node = nodes[0]
 					# field의 경우 value/text 요소에 값을 설정해야 함
 					if strip_ns(node.tag) == "field":
-						# value 요소 찾기
-						value_parent = node.find(".//{*}value")
+						# value 요소 찾기 (XFA에서 value는 field의 직접 자식이므로 하위 트리 전체를 검색하지 않음)
+						value_parent = node.find("{*}value")
 						if value_parent is None:
-							# value 요소가 없으면 생성
-							from lxml.etree import Element
-							NS_XFA_FORM = "http://www.xfa.org/schema/xfa-form/2.8/"
-							value_parent = Element(f"{{{NS_XFA_FORM}}}value")
-							# override 속성 설정 (PDF 뷰어가 값을 인식하도록)
-							value_parent.set("override", "1")
-							node.append(value_parent)
+							# value 요소가 없으면 생성 (override 속성: PDF 뷰어가 값을 인식하도록)
+							value_parent = etree.SubElement(node, _VALUE_QNAME, attrib={"override": "1"})
 						else:
 							# value 요소가 있으면 override 속성도 설정
 							value_parent.set("override", "1")
 						
-						# text 요소 찾기
-						value_text = value_parent.find(".//{*}text")
+						# text 요소 찾기 (value의 직접 자식)
+						value_text = value_parent.find("{*}text")
 						if value_text is None:
 							# text 요소가 없으면 생성
-							from lxml.etree import Element
-							NS_XFA_FORM = "http://www.xfa.org/schema/xfa-form/2.8/"
-							value_text = Element(f"{{{NS_XFA_FORM}}}text")
-							value_parent.append(value_text)
+							value_text = etree.SubElement(value_parent, _TEXT_QNAME)
 						
 						value_text.text = "" if val is None else str(val)
 						return